@@ -26,6 +26,9 @@ class Settings(BaseSettings):
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_MAX_CONNECTIONS: int = 50  # Async connection pool size per worker
+    REDIS_SOCKET_TIMEOUT: float = 0.5  # Seconds; a slow Redis falls back instead of stalling requests
+    REDIS_HEALTH_CHECK_SECONDS: int = 5  # Ping interval; also how soon Redis is used again after an outage
     
     # Security
     SECRET_KEY: str = "CHANGE_THIS_IN_PRODUCTION_TO_A_LONG_RANDOM_STRING"
@@ -33,15 +36,88 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     
+    # Token revocation (logout)
+    TOKEN_REVOCATION_CAPACITY: int = 100000  # Expected revoked, unexpired tokens
+    TOKEN_REVOCATION_ERROR_RATE: float = 0.001  # Bloom filter false positive rate
+    TOKEN_REVOCATION_SYNC_SECONDS: int = 5  # How often workers reload revocations
+    
+    # CPU offload (bcrypt, PBKDF2)
+    CPU_EXECUTOR_WORKERS: int = 2  # Concurrent password hashes / key derivations per worker
+    
     # Encryption
     AES_KEY: str = "CHANGE_THIS_32_BYTE_KEY_IN_PROD!"  # Must be 32 bytes
     
+    # Logging
+    LOG_LEVEL: str = ""  # Defaults to INFO with DEBUG on, WARNING otherwise
+    LOG_FORMAT: str = "json"  # json or text
+    ACCESS_LOG_LEVEL: str = "INFO"  # Access records below this level are dropped
+    # Access log level per path prefix for successful requests ("path=LEVEL", comma separated)
+    ACCESS_LOG_ROUTE_LEVELS: str = "/health=DEBUG"
+    # Fraction of 2xx requests logged per path prefix ("path=rate"); errors are always logged
+    ACCESS_LOG_SAMPLE_RATES: str = "/api/v1/bills=0.1,/api/v1/notifications=0.1"
+    
+    # Query statistics (per request counts, Server-Timing, slow queries)
+    QUERY_STATS_ENABLED: bool = True
+    SLOW_QUERY_MS: int = 200  # Statements at least this slow are logged, parameters redacted
+    N_PLUS_ONE_DETECTION: bool = False  # Dev only (needs DEBUG): warn on repeated statements
+    N_PLUS_ONE_THRESHOLD: int = 5  # Executions of one statement per request that trigger the warning
+    
+    # Metrics
+    METRICS_ENABLED: bool = True  # Serve /metrics (restrict it to the scraper at the proxy)
+    PROFILER_MAX_SECONDS: int = 60  # Longest on-demand sampling profile (super admin only)
+    
     # Rate Limiting
-    RATE_LIMIT_PER_MINUTE: int = 100
+    RATE_LIMIT_PER_MINUTE: int = 100  # Per citizen (token subject) or anonymous IP
+    RATE_LIMIT_ADMIN_PER_MINUTE: int = 300  # Per admin
+    RATE_LIMIT_KIOSK_PER_MINUTE: int = 300  # Per registered kiosk and IP for requests without a token
+    RATE_LIMIT_KIOSK_IDS: str = ""  # Registered kiosk ids (comma separated); others are limited per IP
+    RATE_LIMIT_TOKEN_CACHE_SIZE: int = 10000  # Verified tokens remembered for keying
+    # Per-route limits per minute, "path-prefix=limit" comma separated
+    RATE_LIMIT_ROUTES: str = "/api/v1/auth/login=5,/api/v1/auth/verify-otp=10,/api/v1/admin/login=10"
+    RATE_LIMIT_LOCAL_MAX_KEYS: int = 100000  # In-process limiter table bound (used without Redis)
+    RATE_LIMIT_MODE: str = "redis"  # redis (one round trip per request) or hybrid (leased batches)
+    RATE_LIMIT_LEASE_SIZE: int = 10  # Hybrid: max tokens a worker leases at once (the slack per worker)
+    RATE_LIMIT_LEASE_SECONDS: float = 1.0  # Hybrid: unused leased tokens are forfeited after this
+    
+    # Audit log writer (group commit)
+    AUDIT_WRITER_ENABLED: bool = True
+    AUDIT_BATCH_SIZE: int = 200
+    AUDIT_FLUSH_INTERVAL_MS: int = 5
+    AUDIT_QUEUE_MAX_SIZE: int = 10000
+    AUDIT_DURABLE: bool = False  # Requests wait until their audit batch commits
+    AUDIT_WRITER_LANES: int = 1  # Concurrent writer tasks; chains are split across lanes
+    AUDIT_CHAIN_SHARDING: str = "none"  # none, kiosk, user_bucket, resource_type
+    AUDIT_CHAIN_USER_BUCKETS: int = 16
+    AUDIT_ANCHOR_INTERVAL_SECONDS: int = 60
+    AUDIT_VERIFY_BATCH_SIZE: int = 5000
+    AUDIT_VERIFY_WORKERS: int = 4  # Processes used to recompute hashes
+    # Rows newer than this are verified but not checkpointed (lower ids may still be committing)
+    AUDIT_VERIFY_SETTLE_SECONDS: int = 60
+    AUDIT_MERKLE_SEGMENT_SIZE: int = 1024  # Audit rows per Merkle checkpoint
+    
+    # Payments
+    PAYMENT_CHAIN_CACHE_SIZE: int = 10000  # Cached per-user payment chain heads
+    IDEMPOTENCY_TTL_SECONDS: int = 86400  # How long Idempotency-Key responses are replayed
+    OFFLINE_PAYMENT_MAX_AGE_HOURS: int = 72  # Older queued_at values are clamped to this window
+    
+    # Authenticated principal cache
+    PRINCIPAL_CACHE_SIZE: int = 10000  # Cached users/admins (LRU)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 30  # Bounds staleness across workers
+    
+    # Admin dashboard
+    DASHBOARD_CACHE_TTL_SECONDS: float = 10  # Per worker; concurrent refreshes share one computation
+    
+    # Receipt QR rendering
+    RECEIPT_QR_EXECUTOR: str = "thread"  # thread or process
+    RECEIPT_QR_WORKERS: int = 2
+    RECEIPT_QR_CACHE_SIZE: int = 1000  # Rendered images kept (LRU)
     
     # OTP
     OTP_EXPIRE_MINUTES: int = 5
     OTP_LENGTH: int = 6
+    OTP_MAX_ATTEMPTS: int = 5  # Wrong guesses before an OTP is invalidated
+    OTP_LOCAL_MAX_ENTRIES: int = 10000  # In-process store bound (used without Redis)
+    OTP_SWEEP_INTERVAL_SECONDS: int = 60  # How often expired in-process OTPs are purged
     
     # Session
     SESSION_TIMEOUT_MINUTES: int = 10
@@ -3,16 +3,33 @@ Database Connection and Session Management
 """
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import NullPool, AsyncAdaptedQueuePool
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
+import time
 
 from app.config import settings
+from app.metrics import registry, db_pool_checkouts, db_pool_wait, db_pool_connections
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records checkouts and how long each one waited"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        finally:
+            db_pool_wait.observe(time.perf_counter() - start)
+        db_pool_checkouts.inc()
+        return connection
+
 
 # Create async engine
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=settings.DEBUG,
+    poolclass=InstrumentedPool,
     pool_size=settings.DATABASE_POOL_SIZE,
     max_overflow=settings.DATABASE_MAX_OVERFLOW,
     pool_pre_ping=True,
@@ -27,6 +44,16 @@ async_session_maker = async_sessionmaker(
     autoflush=False,
 )
 
+
+def _collect_pool_metrics() -> None:
+    pool = engine.sync_engine.pool
+    db_pool_connections.set("in_use", value=pool.checkedout())
+    db_pool_connections.set("idle", value=pool.checkedin())
+    db_pool_connections.set("overflow", value=max(0, pool.overflow()))
+
+
+registry.add_collector(_collect_pool_metrics)
+
 # Base class for models
 Base = declarative_base()
 
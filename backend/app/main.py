@@ -5,23 +5,37 @@ Smart Urban Virtual Interactive Digital Helpdesk Assistant
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 from datetime import datetime
 import logging
 
 from app.config import settings
-from app.database import init_db, close_db
+from app.utils.logging_setup import setup_logging, shutdown_logging
+from app.database import engine, init_db, close_db
+from app.utils.audit_writer import start_audit_writer, stop_audit_writer
+from app.utils.receipts import receipt_renderer
+from app.utils.cpu_executor import run_cpu_bound, shutdown_cpu_executor
+from app.utils.encryption import init_encryption
+from app.utils.redis_client import redis_manager
+from app.utils.otp_store import local_otp_store
+from app.utils.token_revocation import token_revocation
+from app.metrics import registry
+from app.utils.query_stats import install_query_stats
 from app.middleware.rate_limit import RateLimitMiddleware
 from app.middleware.logging import RequestLoggingMiddleware
+from app.middleware.metrics import MetricsMiddleware
 
 # Import routers
 from app.routers import auth, billing, grievance, connection, document, notification, analytics, admin
 
 # Configure logging
-logging.basicConfig(level=logging.INFO if settings.DEBUG else logging.WARNING)
+setup_logging()
 logger = logging.getLogger("suvidha")
 
+if settings.QUERY_STATS_ENABLED:
+    install_query_stats(engine)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -30,10 +44,22 @@ async def lifespan(app: FastAPI):
     logger.info("Starting SUVIDHA Backend...")
     await init_db()
     logger.info("Database initialized")
+    await run_cpu_bound(init_encryption)
+    await redis_manager.start()
+    await local_otp_store.start()
+    await start_audit_writer()
+    await token_revocation.start()
     yield
     # Shutdown
     logger.info("Shutting down SUVIDHA Backend...")
+    await token_revocation.stop()
+    await stop_audit_writer()
+    receipt_renderer.shutdown()
+    shutdown_cpu_executor()
+    await local_otp_store.stop()
+    await redis_manager.stop()
     await close_db()
+    shutdown_logging()
 
 
 # Create FastAPI application
@@ -82,6 +108,9 @@ app.add_middleware(
 # Custom middleware
 app.add_middleware(RequestLoggingMiddleware)
 app.add_middleware(RateLimitMiddleware)
+if settings.METRICS_ENABLED:
+    # Outermost, so rate-limited requests are counted too
+    app.add_middleware(MetricsMiddleware)
 
 
 # Exception handlers
@@ -130,10 +159,19 @@ async def health_check():
         "status": "healthy",
         "version": settings.APP_VERSION,
         "timestamp": datetime.utcnow().isoformat(),
-        "service": "SUVIDHA Backend"
+        "service": "SUVIDHA Backend",
+        "redis": redis_manager.health()
     }
 
 
+# Metrics endpoint
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+    async def metrics():
+        """Metrics for this worker in Prometheus text exposition format"""
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 # Root endpoint
 @app.get("/", tags=["Root"])
 async def root():
@@ -0,0 +1,204 @@
+"""
+In-process metrics
+
+Counters, gauges and fixed-bucket histograms rendered in the Prometheus
+text exposition format at /metrics. Updates are plain dict and list
+operations without locks: every instrumented call site (middleware, the
+database pool, Redis, the audit writer) runs on the event loop thread.
+Metrics are per worker; the scraper sums them across workers.
+"""
+import math
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Seconds; covers sub-millisecond cache hits through multi-second stalls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Base class: a named family of series keyed by label values"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Sequence[str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labels}")
+        return tuple(labels)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        # Unlabelled metrics are reported (as zero) before the first update
+        self.values: Dict[Tuple[str, ...], float] = {} if self.labelnames else {(): 0}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, value in self.values.items():
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value that can go up and down; usually set by a collector at scrape time"""
+
+    kind = "gauge"
+
+    def set(self, *labels: str, value: float) -> None:
+        self.values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    """Observations counted into fixed buckets, plus their sum and count"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per series: [count per bucket (last is +Inf)..., sum]
+        self.series: Dict[Tuple[str, ...], List[float]] = {}
+        if not self.labelnames:
+            self.series[()] = [0] * (len(self.buckets) + 2)
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        cells = self.series.get(key)
+        if cells is None:
+            cells = self.series[key] = [0] * (len(self.buckets) + 2)
+        cells[bisect_left(self.buckets, value)] += 1
+        cells[-1] += value
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, cells in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), cells):
+                cumulative += count
+                le = _labels(self.labelnames, key, f'le="{_number(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_number(cells[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric family and renders them for a scrape"""
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+        self.collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Register a callback that updates gauges right before each scrape"""
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self.collectors:
+            collector()
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# HTTP
+http_requests = registry.counter(
+    "suvidha_http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+)
+http_request_duration = registry.histogram(
+    "suvidha_http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")
+)
+
+# Database pool
+db_pool_checkouts = registry.counter("suvidha_db_pool_checkouts_total", "Database connections checked out")
+db_pool_wait = registry.histogram(
+    "suvidha_db_pool_wait_seconds", "Time spent waiting for a database connection from the pool"
+)
+db_pool_connections = registry.gauge(
+    "suvidha_db_pool_connections", "Database pool connections by state", ("state",)
+)
+
+# Audit log
+audit_write_duration = registry.histogram(
+    "suvidha_audit_write_seconds",
+    "Audit write latency: inline flush, queued submit, or writer batch commit",
+    ("mode",),
+)
+audit_write_errors = registry.counter("suvidha_audit_write_errors_total", "Failed audit writer batches")
+
+# Redis
+redis_command_duration = registry.histogram(
+    "suvidha_redis_command_seconds", "Redis command latency", ("command",)
+)
+redis_errors = registry.counter("suvidha_redis_errors_total", "Failed Redis commands", ("command",))
+
+# Rate limiting
+rate_limit_rejections = registry.counter(
+    "suvidha_rate_limit_rejections_total", "Requests rejected with 429 by bucket and principal kind", ("bucket", "kind")
+)
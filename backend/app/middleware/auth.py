@@ -9,6 +9,7 @@ from typing import Optional
 
 from app.database import get_db
 from app.utils.security import verify_token
+from app.utils.principal_cache import principal_cache
 from app.models.user import User
 from app.models.admin import Admin
 
@@ -30,7 +31,7 @@ class AuthMiddleware:
             return None
         
         token = credentials.credentials
-        payload = verify_token(token, token_type="access")
+        payload = await verify_token(token, token_type="access")
         
         if not payload:
             return None
@@ -52,7 +53,7 @@ async def get_current_user(
         )
     
     token = credentials.credentials
-    payload = verify_token(token, token_type="access")
+    payload = await verify_token(token, token_type="access")
     
     if not payload:
         raise HTTPException(
@@ -68,6 +69,10 @@ async def get_current_user(
             detail="Invalid token payload",
         )
     
+    user = await principal_cache.get(db, "user", int(user_id))
+    if user:
+        return user
+    
     # Fetch user from database
     result = await db.execute(
         select(User).where(User.id == int(user_id), User.is_active == True)
@@ -80,6 +85,7 @@ async def get_current_user(
             detail="User not found or inactive",
         )
     
+    await principal_cache.set("user", user)
     return user
 
 
@@ -112,7 +118,7 @@ async def get_current_admin(
         )
     
     token = credentials.credentials
-    payload = verify_token(token, token_type="access")
+    payload = await verify_token(token, token_type="access")
     
     if not payload or payload.get("user_type") != "admin":
         raise HTTPException(
@@ -128,6 +134,10 @@ async def get_current_admin(
             detail="Invalid token payload",
         )
     
+    admin = await principal_cache.get(db, "admin", int(admin_id))
+    if admin:
+        return admin
+    
     # Fetch admin from database
     result = await db.execute(
         select(Admin).where(Admin.id == int(admin_id), Admin.is_active == True)
@@ -140,6 +150,7 @@ async def get_current_admin(
             detail="Admin not found or inactive",
         )
     
+    await principal_cache.set("admin", admin)
     return admin
 
 
@@ -1,62 +1,119 @@
 """
 Request Logging Middleware
 """
+import logging
+import random
 import time
 import uuid
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-import logging
+from typing import Optional
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.utils.logging_setup import parse_route_settings
+from app.utils.query_stats import RequestQueryStats, start_request_stats, finish_request_stats
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("suvidha")
+access_logger = logging.getLogger("suvidha.access")
 
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware for logging all requests"""
+class RequestLoggingMiddleware:
+    """
+    Middleware for logging all requests (pure ASGI).
+    Emits one structured access record per request. Successful requests
+    are logged at their route's level (ACCESS_LOG_ROUTE_LEVELS) and may be
+    sampled (ACCESS_LOG_SAMPLE_RATES); 4xx are logged at WARNING and 5xx
+    at ERROR, always. The level and sampling decision are made before
+    any record is built, so skipped requests cost almost nothing.
+    With QUERY_STATS_ENABLED each request's query count and database time
+    are added to the record and sent in a Server-Timing header.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.route_levels = parse_route_settings(settings.ACCESS_LOG_ROUTE_LEVELS, logging.getLevelName)
+        self.sample_rates = parse_route_settings(settings.ACCESS_LOG_SAMPLE_RATES, float)
+        self.query_stats = settings.QUERY_STATS_ENABLED
+    
+    def _success_level(self, path: str) -> int:
+        for prefix, level in self.route_levels:
+            if path.startswith(prefix):
+                return level
+        return logging.INFO
+    
+    def _sampled(self, path: str) -> bool:
+        for prefix, rate in self.sample_rates:
+            if path.startswith(prefix):
+                return random.random() < rate
+        return True
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
         # Generate request ID
         request_id = str(uuid.uuid4())[:8]
         
         # Start timer
-        start_time = time.time()
+        start_time = time.perf_counter()
         
-        # Get client info
-        client_ip = request.client.host if request.client else "unknown"
-        method = request.method
-        path = request.url.path
+        # Add request ID to state for access in routes (request.state.request_id)
+        scope.setdefault("state", {})["request_id"] = request_id
         
-        # Log request
-        logger.info(f"[{request_id}] {method} {path} - Client: {client_ip}")
+        status_code = 500
+        stats = None
+        if self.query_stats:
+            stats, stats_token = start_request_stats(scope["path"])
         
-        # Add request ID to state for access in routes
-        request.state.request_id = request_id
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                # Add request ID header
+                headers["X-Request-ID"] = request_id
+                if stats is not None:
+                    # Queries run so far; the access log has the final totals
+                    headers.append("Server-Timing", stats.server_timing())
+            await send(message)
         
         try:
-            response = await call_next(request)
-            
-            # Calculate duration
-            duration = time.time() - start_time
-            
-            # Log response
-            logger.info(
-                f"[{request_id}] {method} {path} - "
-                f"Status: {response.status_code} - "
-                f"Duration: {duration:.3f}s"
-            )
-            
-            # Add request ID header
-            response.headers["X-Request-ID"] = request_id
-            
-            return response
-        
+            await self.app(scope, receive, send_with_request_id)
         except Exception as e:
-            duration = time.time() - start_time
             logger.error(
-                f"[{request_id}] {method} {path} - "
-                f"Error: {str(e)} - "
-                f"Duration: {duration:.3f}s"
+                "Unhandled error",
+                extra=self._fields(scope, request_id, status_code, start_time, stats, error=str(e)),
             )
             raise
+        finally:
+            if stats is not None:
+                finish_request_stats(stats_token)
+        
+        if status_code >= 500:
+            level = logging.ERROR
+        elif status_code >= 400:
+            level = logging.WARNING
+        else:
+            level = self._success_level(scope["path"])
+            if not access_logger.isEnabledFor(level) or not self._sampled(scope["path"]):
+                return
+        
+        access_logger.log(level, "request", extra=self._fields(scope, request_id, status_code, start_time, stats))
+    
+    @staticmethod
+    def _fields(scope: Scope, request_id: str, status_code: int, start_time: float,
+                stats: Optional[RequestQueryStats], **extra) -> dict:
+        client = scope.get("client")
+        if stats is not None:
+            extra.update(db_queries=stats.count, db_ms=stats.duration_ms)
+        return {
+            "request_id": request_id,
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status_code,
+            # Until the response body has been sent
+            "duration_ms": round((time.perf_counter() - start_time) * 1000, 2),
+            "client_ip": client[0] if client else "unknown",
+            **extra,
+        }
@@ -0,0 +1,53 @@
+"""
+Request Metrics Middleware
+"""
+import sys
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.metrics import http_requests, http_request_duration
+from app.utils.profiler import route_profiler
+
+
+class MetricsMiddleware:
+    """
+    Counts requests and records their latency per route template (pure ASGI).
+    Routes are labelled by their template ("/api/v1/bills/{bill_id}"), so
+    label cardinality stays bounded; unmatched paths share one label.
+    While the route profiler is enabled, requests are also registered with
+    it so its samples can be charged to their route.
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start_time = time.perf_counter()
+        status_code = 500
+        profiling = route_profiler.enabled
+        if profiling:
+            frame = sys._getframe()
+            route_profiler.begin(frame, scope)
+        
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            http_requests.inc(method, template, str(status_code))
+            elapsed = time.perf_counter() - start_time
+            http_request_duration.observe(elapsed, method, template)
+            if profiling:
+                route_profiler.end(frame, scope, elapsed)
@@ -1,125 +1,336 @@
 """
 Rate Limiting Middleware
+
+Limits use GCRA (the generic cell rate algorithm, a token bucket stored
+as one "theoretical arrival time" per key): `limit` requests per
+`window` seconds, with bursts of up to `limit`. In Redis the check is a
+single atomic Lua script, so each key costs one value and each request
+one round trip. In hybrid mode (RATE_LIMIT_MODE=hybrid) workers lease
+tokens in batches and most requests need no round trip at all.
 """
+import math
 import time
-from typing import Dict, Tuple
-from fastapi import Request, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
-import redis
+from collections import OrderedDict
+from typing import Tuple, List, Optional
+from fastapi import status
+from fastapi.responses import JSONResponse
+from jose import jwt, JWTError
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.config import settings
+from app.utils.redis_client import get_redis, redis_manager
+from app.metrics import rate_limit_rejections
+
+# KEYS[1]: bucket key. ARGV: emission interval (ms), burst tolerance (ms),
+# tokens wanted. Takes up to the wanted number of tokens at once.
+# Returns {granted, remaining, retry_after_ms}.
+GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+local want = tonumber(ARGV[3])
+local now_parts = redis.call('TIME')
+local now = now_parts[1] * 1000 + math.floor(now_parts[2] / 1000)
+
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+
+local available = math.floor((now + tolerance - tat) / interval)
+if available < 1 then
+    return {0, 0, math.ceil(tat + interval - tolerance - now)}
+end
+
+local granted = math.min(want, available)
+local new_tat = tat + granted * interval
+redis.call('SET', KEYS[1], new_tat, 'PX', math.ceil(new_tat - now))
+return {granted, available - granted, 0}
+"""
 
 
 class InMemoryRateLimiter:
-    """Simple in-memory rate limiter for development"""
+    """
+    In-process GCRA limiter, used without Redis or while it is down.
+    One float per key; keys are kept in least-recently-used order, so
+    keys whose bucket has refilled are evicted from the front as new
+    requests arrive and the table never exceeds max_keys. Runs on the
+    event loop thread only, so it needs no lock.
+    """
     
-    def __init__(self):
-        self.requests: Dict[str, list] = {}
+    def __init__(self, max_keys: int = None):
+        self.max_keys = max_keys or settings.RATE_LIMIT_LOCAL_MAX_KEYS
+        # key -> theoretical arrival time (monotonic seconds)
+        self.tats: "OrderedDict[str, float]" = OrderedDict()
     
-    def is_allowed(self, key: str, limit: int, window: int) -> Tuple[bool, int]:
-        """Check if request is allowed. Returns (allowed, remaining)"""
-        current_time = time.time()
-        
-        if key not in self.requests:
-            self.requests[key] = []
+    def _evict(self, now: float) -> None:
+        # Front keys are the least recently used; a key whose TAT has
+        # passed is indistinguishable from a new key, so dropping it is free
+        tats = self.tats
+        while tats:
+            key = next(iter(tats))
+            if tats[key] > now and len(tats) <= self.max_keys:
+                break
+            del tats[key]
+    
+    def is_allowed(self, key: str, limit: int, window: int) -> Tuple[bool, int, int]:
+        """Check if request is allowed. Returns (allowed, remaining, retry_after)"""
+        now = time.monotonic()
+        interval = window / limit
         
-        # Clean old requests
-        self.requests[key] = [t for t in self.requests[key] if t > current_time - window]
+        tat = self.tats.get(key)
+        known = tat is not None
+        if not known or tat < now:
+            tat = now
+        new_tat = tat + interval
+        allow_at = new_tat - window
         
-        if len(self.requests[key]) >= limit:
-            return False, 0
+        if allow_at > now:
+            self.tats.move_to_end(key)
+            return False, 0, math.ceil(allow_at - now)
         
-        self.requests[key].append(current_time)
-        return True, limit - len(self.requests[key])
+        self.tats[key] = new_tat
+        if known:
+            self.tats.move_to_end(key)
+        else:
+            # The table only grows on new keys, so evicting here bounds it
+            self._evict(now)
+        return True, int((now - allow_at) / interval), 0
 
 
 class RedisRateLimiter:
-    """Redis-based rate limiter for production"""
+    """Redis GCRA rate limiter for production, in-memory while Redis is down"""
     
-    def __init__(self, redis_url: str):
-        try:
-            self.redis = redis.from_url(redis_url, decode_responses=True)
-        except Exception:
-            self.redis = None
+    def __init__(self):
+        self.fallback = InMemoryRateLimiter()
+        self._script = None
+    
+    def _get_script(self, client):
+        if self._script is None or self._script.registered_client is not client:
+            self._script = client.register_script(GCRA_SCRIPT)
+        return self._script
     
-    def is_allowed(self, key: str, limit: int, window: int) -> Tuple[bool, int]:
-        """Check if request is allowed using sliding window"""
-        if not self.redis:
-            return True, limit
+    async def _take(self, client, key: str, limit: int, window: int, want: int) -> Tuple[int, int, int]:
+        """Take up to `want` tokens from a bucket. Returns (granted, remaining, retry_after)"""
+        interval_ms = window * 1000 / limit
+        granted, remaining, retry_after_ms = await self._get_script(client)(
+            keys=[f"rate:{key}"],
+            args=[interval_ms, interval_ms * limit, want],
+        )
+        return int(granted), int(remaining), math.ceil(int(retry_after_ms) / 1000)
+    
+    async def is_allowed(self, key: str, limit: int, window: int) -> Tuple[bool, int, int]:
+        """Check if request is allowed. Returns (allowed, remaining, retry_after)"""
+        client = get_redis()
+        if not client:
+            return self.fallback.is_allowed(key, limit, window)
         
         try:
-            pipe = self.redis.pipeline()
-            now = time.time()
-            
-            # Use sorted set for sliding window
-            rate_key = f"rate:{key}"
-            
-            pipe.zremrangebyscore(rate_key, 0, now - window)
-            pipe.zadd(rate_key, {str(now): now})
-            pipe.zcard(rate_key)
-            pipe.expire(rate_key, window)
-            
-            results = pipe.execute()
-            current_count = results[2]
-            
-            if current_count > limit:
-                return False, 0
-            
-            return True, limit - current_count
+            granted, remaining, retry_after = await self._take(client, key, limit, window, 1)
         except Exception:
-            # Fail open if Redis is down
-            return True, limit
+            redis_manager.mark_failed()
+            return self.fallback.is_allowed(key, limit, window)
+        
+        return granted > 0, remaining, retry_after
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Rate limiting middleware"""
+class HybridRateLimiter(RedisRateLimiter):
+    """
+    Redis limiter that leases tokens in batches. Each worker takes up to
+    `lease_size` tokens from the shared bucket at once and grants
+    requests from that local allotment without a network hop, refilling
+    from Redis when it runs out. Leased tokens are already spent in the
+    shared bucket, so the fleet never exceeds the limit; the error is
+    that up to `lease_size` tokens per worker and key may sit unused
+    while another worker is refused, and are forfeited after
+    `lease_seconds`. Small limits (under 10 * lease_size) use
+    proportionally smaller leases, down to exact per-request checks.
+    """
     
-    def __init__(self, app, requests_per_minute: int = None):
-        super().__init__(app)
-        self.limit = requests_per_minute or settings.RATE_LIMIT_PER_MINUTE
-        self.window = 60  # 1 minute
+    def __init__(self, lease_size: int, lease_seconds: float, max_keys: int):
+        super().__init__()
+        self.lease_size = lease_size
+        self.lease_seconds = lease_seconds
+        self.max_keys = max_keys
+        # key -> [tokens left, lease expiry (monotonic), shared remaining at lease time]
+        self.leases: "OrderedDict[str, list]" = OrderedDict()
+    
+    async def is_allowed(self, key: str, limit: int, window: int) -> Tuple[bool, int, int]:
+        """Check if request is allowed. Returns (allowed, remaining, retry_after)"""
+        now = time.monotonic()
+        lease = self.leases.get(key)
+        if lease is not None and lease[0] > 0 and lease[1] > now:
+            lease[0] -= 1
+            self.leases.move_to_end(key)
+            return True, lease[0] + lease[2], 0
+        
+        client = get_redis()
+        if not client:
+            return self.fallback.is_allowed(key, limit, window)
         
-        # Try Redis first, fallback to in-memory
+        want = max(1, min(self.lease_size, limit // 10))
         try:
-            self.limiter = RedisRateLimiter(settings.REDIS_URL)
-            if not self.limiter.redis:
-                raise Exception("Redis not available")
+            granted, remaining, retry_after = await self._take(client, key, limit, window, want)
         except Exception:
-            self.limiter = InMemoryRateLimiter()
+            redis_manager.mark_failed()
+            return self.fallback.is_allowed(key, limit, window)
+        
+        if not granted:
+            return False, 0, retry_after
+        
+        # Another request for this key may have refilled the lease meanwhile
+        lease = self.leases.get(key)
+        if lease is not None and lease[1] > now:
+            lease[0] += granted - 1
+            lease[2] = remaining
+        else:
+            lease = [granted - 1, now + self.lease_seconds, remaining]
+            self.leases[key] = lease
+        self.leases.move_to_end(key)
+        while len(self.leases) > self.max_keys:
+            self.leases.popitem(last=False)
+        return True, lease[0] + lease[2], 0
+
+
+class TokenSubjectCache:
+    """
+    Verified JWT -> principal key ("user:<sub>" / "admin:<sub>"), cached
+    per token until it expires so each token's signature is checked once
+    rather than on every request. Invalid tokens are not cached.
+    """
+    
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        # token -> (principal key, exp)
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
     
-    async def dispatch(self, request: Request, call_next):
-        # Skip rate limiting for health checks
-        if request.url.path in ["/health", "/", "/docs", "/openapi.json"]:
-            return await call_next(request)
+    def principal(self, token: str) -> Optional[str]:
+        entry = self._entries.get(token)
+        if entry is not None:
+            if entry[1] > time.time():
+                self._entries.move_to_end(token)
+                return entry[0]
+            del self._entries[token]
         
-        # Get client identifier (IP or user ID)
-        client_ip = request.client.host if request.client else "unknown"
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
+            return None
+        sub = payload.get("sub")
+        if not sub or payload.get("type") != "access":
+            return None
         
-        # Check authorization header for user-specific limiting
-        auth_header = request.headers.get("Authorization", "")
-        if auth_header.startswith("Bearer "):
-            key = f"user:{auth_header[7:20]}"  # Use token prefix
+        kind = "admin" if payload.get("user_type") == "admin" else "user"
+        key = f"{kind}:{sub}"
+        self._entries[token] = (key, float(payload.get("exp", 0)))
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return key
+
+
+def parse_route_limits(spec: str) -> List[Tuple[str, int]]:
+    """Parse "path=limit,path=limit" into (path prefix, limit), longest prefix first"""
+    limits = []
+    for item in spec.split(","):
+        if "=" in item:
+            path, limit = item.split("=", 1)
+            limits.append((path.strip(), int(limit)))
+    return sorted(limits, key=lambda entry: len(entry[0]), reverse=True)
+
+
+class RateLimitMiddleware:
+    """Rate limiting middleware (pure ASGI)"""
+    
+    # Paths that are never rate limited (health checks, metrics, docs)
+    EXEMPT_PATHS = {"/health", "/metrics", "/", "/docs", "/openapi.json"}
+    
+    def __init__(self, app: ASGIApp, requests_per_minute: int = None):
+        self.app = app
+        self.window = 60  # 1 minute
+        # Budget per principal kind: citizens, admins, kiosks, anonymous IPs
+        self.limits = {
+            "user": requests_per_minute or settings.RATE_LIMIT_PER_MINUTE,
+            "admin": settings.RATE_LIMIT_ADMIN_PER_MINUTE,
+            "kiosk": settings.RATE_LIMIT_KIOSK_PER_MINUTE,
+            "ip": requests_per_minute or settings.RATE_LIMIT_PER_MINUTE,
+        }
+        # Stricter budgets for sensitive routes (e.g. OTP requests), per path prefix
+        self.route_limits = parse_route_limits(settings.RATE_LIMIT_ROUTES)
+        # Only registered kiosks get their own budget; any other X-Kiosk-ID is ignored
+        self.kiosk_ids = {k.strip() for k in settings.RATE_LIMIT_KIOSK_IDS.split(",") if k.strip()}
+        self.subjects = TokenSubjectCache(settings.RATE_LIMIT_TOKEN_CACHE_SIZE)
+        
+        # Redis when reachable, in-memory otherwise
+        if settings.RATE_LIMIT_MODE == "hybrid":
+            self.limiter = HybridRateLimiter(
+                lease_size=settings.RATE_LIMIT_LEASE_SIZE,
+                lease_seconds=settings.RATE_LIMIT_LEASE_SECONDS,
+                max_keys=settings.RATE_LIMIT_LOCAL_MAX_KEYS,
+            )
         else:
-            key = f"ip:{client_ip}"
+            self.limiter = RedisRateLimiter()
+    
+    def _client_key(self, headers: Headers, client: Optional[Tuple[str, int]]) -> str:
+        """
+        Who the request counts against: the verified token subject, else a
+        registered kiosk (X-Kiosk-ID) at this IP, else the client IP.
+        Unregistered kiosk ids are ignored, so a made-up header cannot
+        buy a fresh bucket.
+        """
+        auth_header = headers.get("Authorization", "")
+        if auth_header.startswith("Bearer "):
+            principal = self.subjects.principal(auth_header[7:])
+            if principal:
+                return principal
         
-        allowed, remaining = self.limiter.is_allowed(key, self.limit, self.window)
+        ip = client[0] if client else "unknown"
+        kiosk_id = headers.get("X-Kiosk-ID")
+        if kiosk_id and kiosk_id in self.kiosk_ids:
+            return f"kiosk:{kiosk_id}:{ip}"
+        
+        return f"ip:{ip}"
+    
+    def _limit_for(self, path: str, client_key: str, client: Optional[Tuple[str, int]]) -> Tuple[str, str, int]:
+        """
+        Bucket scope, bucket owner key and limit for a path and client.
+        Per-route budgets (login, OTP) are always keyed on the client IP.
+        """
+        for prefix, limit in self.route_limits:
+            if path.startswith(prefix):
+                return prefix, f"ip:{client[0] if client else 'unknown'}", limit
+        return "global", client_key, self.limits[client_key.split(":", 1)[0]]
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Skip rate limiting for health checks and non-HTTP traffic
+        if scope["type"] != "http" or scope["path"] in self.EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+        
+        client = scope.get("client")
+        bucket, key, limit = self._limit_for(scope["path"], self._client_key(Headers(scope=scope), client), client)
+        allowed, remaining, retry_after = await self.limiter.is_allowed(f"{bucket}:{key}", limit, self.window)
         
         if not allowed:
-            raise HTTPException(
+            rate_limit_rejections.inc(bucket, key.split(":", 1)[0])
+            response = JSONResponse(
                 status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail="Rate limit exceeded. Please try again later.",
+                content={"detail": "Rate limit exceeded. Please try again later."},
                 headers={
-                    "X-RateLimit-Limit": str(self.limit),
+                    "X-RateLimit-Limit": str(limit),
                     "X-RateLimit-Remaining": "0",
-                    "X-RateLimit-Reset": str(self.window),
-                    "Retry-After": str(self.window),
+                    "X-RateLimit-Reset": str(retry_after),
+                    "Retry-After": str(retry_after),
                 }
             )
+            await response(scope, receive, send)
+            return
         
-        response = await call_next(request)
-        
-        # Add rate limit headers
-        response.headers["X-RateLimit-Limit"] = str(self.limit)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Add rate limit headers
+                headers = MutableHeaders(scope=message)
+                headers["X-RateLimit-Limit"] = str(limit)
+                headers["X-RateLimit-Remaining"] = str(remaining)
+            await send(message)
         
-        return response
+        await self.app(scope, receive, send_with_headers)
@@ -9,7 +9,7 @@ from app.models.grievance import Grievance, GrievanceStatus, GrievanceCategory
 from app.models.connection import ConnectionRequest, ConnectionStatus, ConnectionType
 from app.models.document import Document, DocumentType, DocumentStatus
 from app.models.notification import Notification, NotificationType
-from app.models.audit_log import AuditLog, AuditAction
+from app.models.audit_log import AuditLog, AuditAction, AuditVerificationCheckpoint, AuditMerkleCheckpoint, ROOT_CHAIN_ID
 from app.models.session import KioskSession
 
 __all__ = [
@@ -21,6 +21,6 @@ __all__ = [
     "ConnectionRequest", "ConnectionStatus", "ConnectionType",
     "Document", "DocumentType", "DocumentStatus",
     "Notification", "NotificationType",
-    "AuditLog", "AuditAction",
+    "AuditLog", "AuditAction", "AuditVerificationCheckpoint", "AuditMerkleCheckpoint", "ROOT_CHAIN_ID",
     "KioskSession",
 ]
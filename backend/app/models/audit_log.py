@@ -3,7 +3,7 @@ Audit Log Model - Immutable action records for compliance
 """
 import enum
 from datetime import datetime
-from sqlalchemy import Column, String, DateTime, Enum, Text, Integer
+from sqlalchemy import Column, String, DateTime, Enum, Text, Integer, Index
 from app.database import Base
 
 
@@ -49,6 +49,13 @@ class AuditAction(str, enum.Enum):
     # Data access
     PII_ACCESSED = "pii_accessed"
     DATA_EXPORTED = "data_exported"
+    
+    # Hash chain
+    CHAIN_ANCHOR = "chain_anchor"
+
+
+# Chain that holds unsharded entries and the anchors over shard heads
+ROOT_CHAIN_ID = "root"
 
 
 class AuditLog(Base):
@@ -56,6 +63,9 @@ class AuditLog(Base):
     Immutable audit log with hash chain for tamper detection
     """
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        Index("ix_audit_logs_chain_id_id", "chain_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -78,10 +88,11 @@ class AuditLog(Base):
     kiosk_id = Column(String(50), nullable=True)
     session_id = Column(String(100), nullable=True)
     
-    # Additional data (JSON)
-    metadata = Column(Text, nullable=True)  # JSON string with additional context
+    # Additional data (JSON) - "metadata" is reserved by the declarative API
+    log_metadata = Column("metadata", Text, nullable=True)  # JSON string with additional context
     
-    # Immutable hash chain
+    # Immutable hash chain (one independent chain per shard)
+    chain_id = Column(String(64), default=ROOT_CHAIN_ID, nullable=False)
     log_hash = Column(String(64), nullable=False)  # SHA256
     previous_hash = Column(String(64), nullable=True)  # Links to previous log
     
@@ -90,3 +101,52 @@ class AuditLog(Base):
     
     def __repr__(self):
         return f"<AuditLog(id={self.id}, action={self.action}, actor={self.actor_type})>"
+
+
+class AuditVerificationCheckpoint(Base):
+    """
+    Progress marker written by each audit chain verification run.
+    The latest row lets the next run resume after verified_up_to_id.
+    """
+    __tablename__ = "audit_verification_checkpoints"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Highest audit_logs.id whose hash and linkage were verified
+    verified_up_to_id = Column(Integer, nullable=False)
+    
+    # Last verified hash of every chain (JSON: {chain_id: log_hash})
+    chain_heads = Column(Text, nullable=False)
+    
+    # Run statistics
+    rows_verified = Column(Integer, default=0, nullable=False)
+    duration_ms = Column(Integer, default=0, nullable=False)
+    
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f"<AuditVerificationCheckpoint(id={self.id}, up_to={self.verified_up_to_id})>"
+
+
+class AuditMerkleCheckpoint(Base):
+    """
+    Merkle root over a fixed-size id segment of audit_logs.
+    Segment k covers ids [k * size + 1, (k + 1) * size].
+    """
+    __tablename__ = "audit_merkle_checkpoints"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Segment bounds
+    segment_index = Column(Integer, unique=True, index=True, nullable=False)
+    first_log_id = Column(Integer, nullable=False)
+    last_log_id = Column(Integer, nullable=False)
+    leaf_count = Column(Integer, nullable=False)
+    
+    # Root over the segment's log_hash values in id order
+    merkle_root = Column(String(64), nullable=False)
+    
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f"<AuditMerkleCheckpoint(segment={self.segment_index}, root={self.merkle_root[:12]})>"
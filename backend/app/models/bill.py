@@ -4,7 +4,7 @@ Bill Model - Utility bills for electricity, gas, water
 import enum
 from datetime import datetime, date
 from decimal import Decimal
-from sqlalchemy import Column, String, Boolean, DateTime, Enum, Text, Integer, ForeignKey, Numeric, Date
+from sqlalchemy import Column, String, Boolean, DateTime, Enum, Text, Integer, ForeignKey, Numeric, Date, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -30,6 +30,10 @@ class Bill(Base):
     Utility bill model
     """
     __tablename__ = "bills"
+    __table_args__ = (
+        # Bill listing pages by (due_date, id) within a user
+        Index("ix_bills_user_id_due_date_id", "user_id", "due_date", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
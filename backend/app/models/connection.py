@@ -3,7 +3,7 @@ Connection Request Model - New utility connections
 """
 import enum
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, Enum, Text, Integer, ForeignKey, Numeric
+from sqlalchemy import Column, String, Boolean, DateTime, Enum, Text, Integer, ForeignKey, Numeric, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -40,6 +40,10 @@ class ConnectionRequest(Base):
     New connection request model with workflow tracking
     """
     __tablename__ = "connection_requests"
+    __table_args__ = (
+        # Keyset pagination of the admin list: (created_at, id)
+        Index("ix_connection_requests_created_at_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -3,7 +3,7 @@ Grievance Model - Citizen complaints and service requests
 """
 import enum
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, Enum, Text, Integer, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, Enum, Text, Integer, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -39,6 +39,10 @@ class Grievance(Base):
     Citizen grievance/complaint model with tracking
     """
     __tablename__ = "grievances"
+    __table_args__ = (
+        # Keyset pagination of the admin list: priority ascending, newest first
+        Index("ix_grievances_priority_created_at_id", "priority", text("created_at DESC"), text("id DESC")),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
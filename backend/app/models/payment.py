@@ -4,7 +4,7 @@ Payment Model - Transaction records with immutable hash chain
 import enum
 from datetime import datetime
 from decimal import Decimal
-from sqlalchemy import Column, String, Boolean, DateTime, Enum, Text, Integer, ForeignKey, Numeric
+from sqlalchemy import Column, String, Boolean, DateTime, Enum, Text, Integer, ForeignKey, Numeric, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -32,6 +32,10 @@ class Payment(Base):
     Payment transaction model with immutable hash chain for audit
     """
     __tablename__ = "payments"
+    __table_args__ = (
+        # Keyset pagination of payment history: (initiated_at, id) per user
+        Index("ix_payments_user_id_initiated_at_id", "user_id", "initiated_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -55,7 +59,7 @@ class Payment(Base):
     
     # Receipt
     receipt_number = Column(String(50), unique=True, nullable=True)
-    receipt_qr_code = Column(Text, nullable=True)  # Base64 encoded QR
+    receipt_qr_code = Column(Text, nullable=True)  # Legacy base64 QR; now rendered on demand
     
     # Immutable hash chain for audit trail
     transaction_hash = Column(String(64), nullable=False)  # SHA256
@@ -43,6 +43,9 @@ class User(Base):
     preferred_language = Column(String(10), default="en", nullable=False)
     accessibility_needs = Column(Text, nullable=True)  # JSON string of preferences
     
+    # Head of the user's payment hash chain (last Payment.transaction_hash)
+    payment_chain_head = Column(String(64), nullable=True)
+    
     # Status
     is_active = Column(Boolean, default=True, nullable=False)
     is_verified = Column(Boolean, default=False, nullable=False)
@@ -5,9 +5,10 @@ Admin Router
 - Grievance management
 - System settings
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func
+from sqlalchemy import select, and_, or_, func, tuple_
 from datetime import datetime
 from typing import Optional, List
 
@@ -17,9 +18,13 @@ from app.models.grievance import Grievance, GrievanceStatus
 from app.models.connection import ConnectionRequest, ConnectionStatus
 from app.models.notification import Notification, NotificationType
 from app.schemas.admin import AdminLogin, AdminCreate, AdminResponse
-from app.middleware.auth import get_current_admin
-from app.utils.security import hash_password, verify_password, create_access_token, create_refresh_token
+from app.middleware.auth import get_current_admin, require_role
+from app.utils.security import hash_password, verify_password_async, create_access_token, create_refresh_token
 from app.utils.audit import create_audit_log
+from app.utils.audit_verify import verify_audit_chain
+from app.utils.audit_merkle import get_inclusion_proof
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.profiler import sampling_profiler, route_profiler
 from app.config import settings
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
@@ -53,7 +58,7 @@ async def admin_login(
         )
     
     # Verify password
-    if not verify_password(login_data.password, admin.password_hash):
+    if not await verify_password_async(login_data.password, admin.password_hash):
         admin.failed_login_attempts += 1
         
         # Lock after 5 failed attempts
@@ -129,12 +134,16 @@ async def list_all_grievances(
     status_filter: Optional[GrievanceStatus] = None,
     department: Optional[str] = None,
     priority: Optional[int] = None,
-    limit: int = 50,
-    offset: int = 0,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     admin: Admin = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db)
 ):
-    """List all grievances for admin management"""
+    """
+    List all grievances for admin management.
+    Ordered by priority, then newest first; pass `next_cursor` as `cursor`
+    to get the next page.
+    """
     query = select(Grievance)
     
     # Filter by admin's department if not super admin
@@ -148,12 +157,29 @@ async def list_all_grievances(
     if priority:
         query = query.where(Grievance.priority == priority)
     
-    query = query.order_by(Grievance.priority, Grievance.created_at.desc())
-    query = query.limit(limit).offset(offset)
+    after = decode_cursor(cursor, int, datetime, int)
+    if after:
+        after_priority, after_created_at, after_id = after
+        # The leading bound lets the index scan start at the cursor's priority
+        query = query.where(
+            Grievance.priority >= after_priority,
+            or_(
+                Grievance.priority > after_priority,
+                tuple_(Grievance.created_at, Grievance.id) < tuple_(after_created_at, after_id)
+            )
+        )
+    
+    query = query.order_by(Grievance.priority, Grievance.created_at.desc(), Grievance.id.desc())
+    query = query.limit(limit)
     
     result = await db.execute(query)
     grievances = result.scalars().all()
     
+    next_cursor = None
+    if len(grievances) == limit:
+        last = grievances[-1]
+        next_cursor = encode_cursor(last.priority, last.created_at, last.id)
+    
     return {
         "grievances": [
             {
@@ -169,7 +195,8 @@ async def list_all_grievances(
             }
             for g in grievances
         ],
-        "total": len(grievances)
+        "total": len(grievances),
+        "next_cursor": next_cursor
     }
 
 
@@ -228,23 +255,37 @@ async def update_grievance_status(
 @router.get("/connections")
 async def list_all_connections(
     status_filter: Optional[ConnectionStatus] = None,
-    limit: int = 50,
-    offset: int = 0,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     admin: Admin = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db)
 ):
-    """List all connection requests for admin"""
+    """
+    List all connection requests for admin, newest first.
+    Pass `next_cursor` as `cursor` to get the next page.
+    """
     query = select(ConnectionRequest)
     
     if status_filter:
         query = query.where(ConnectionRequest.status == status_filter)
     
-    query = query.order_by(ConnectionRequest.created_at.desc())
-    query = query.limit(limit).offset(offset)
+    after = decode_cursor(cursor, datetime, int)
+    if after:
+        query = query.where(
+            tuple_(ConnectionRequest.created_at, ConnectionRequest.id) < tuple_(*after)
+        )
+    
+    query = query.order_by(ConnectionRequest.created_at.desc(), ConnectionRequest.id.desc())
+    query = query.limit(limit)
     
     result = await db.execute(query)
     connections = result.scalars().all()
     
+    next_cursor = None
+    if len(connections) == limit:
+        last = connections[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    
     return {
         "connections": [
             {
@@ -259,7 +300,8 @@ async def list_all_connections(
             }
             for c in connections
         ],
-        "total": len(connections)
+        "total": len(connections),
+        "next_cursor": next_cursor
     }
 
 
@@ -370,3 +412,131 @@ async def create_notification(
         "notification_id": notification.id,
         "message": "Notification created successfully"
     }
+
+
+@router.post("/audit/verify")
+async def verify_audit_log_chain(
+    request: Request,
+    full: bool = False,
+    admin: Admin = Depends(require_role(AdminRole.SUPER_ADMIN)),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Verify the audit log hash chain.
+    Resumes from the last checkpoint unless `full` is set.
+    """
+    report = await verify_audit_chain(full=full)
+    
+    await create_audit_log(
+        db=db,
+        action="ADMIN_ACTION",
+        actor_type="admin",
+        admin_id=admin.id,
+        resource_type="audit_log",
+        description=(
+            f"Audit chain verification: {report['status']}, "
+            f"{report['rows_scanned']} rows at {report['rows_per_second']} rows/sec"
+        ),
+        ip_address=request.client.host if request.client else None,
+        metadata={"verified_up_to_id": report["verified_up_to_id"], "failures": len(report["failures"])}
+    )
+    
+    return report
+
+
+@router.get("/audit/proof/{log_id}")
+async def get_audit_inclusion_proof(
+    log_id: int,
+    admin: Admin = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Merkle inclusion proof for an audit log entry.
+    Only entries in verified (sealed) segments have proofs.
+    """
+    proof = await get_inclusion_proof(db, log_id)
+    
+    if not proof:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No checkpoint covers this audit log entry yet"
+        )
+    
+    return proof
+
+
+@router.post("/profile", response_class=PlainTextResponse)
+async def profile_worker(
+    request: Request,
+    seconds: float = Query(10, gt=0, le=settings.PROFILER_MAX_SECONDS),
+    interval_ms: float = Query(10, ge=1, le=1000),
+    all_threads: bool = False,
+    admin: Admin = Depends(require_role(AdminRole.SUPER_ADMIN)),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Sample the stacks of the worker serving this request for `seconds`.
+    Returns collapsed stacks ("frame;frame count" lines) for flamegraph.pl
+    or speedscope. Samples the event loop thread unless `all_threads`.
+    """
+    if sampling_profiler.running:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running in this worker"
+        )
+    
+    await create_audit_log(
+        db=db,
+        action="ADMIN_ACTION",
+        actor_type="admin",
+        admin_id=admin.id,
+        resource_type="profiler",
+        description=f"Sampling profile for {seconds}s at {interval_ms}ms",
+        ip_address=request.client.host if request.client else None,
+    )
+    # Release the pooled connection (admin lookup, inline audit write) before sampling
+    await db.commit()
+    
+    stacks = await sampling_profiler.profile(seconds, interval_ms / 1000, all_threads=all_threads)
+    return PlainTextResponse(stacks)
+
+
+@router.get("/profile/routes")
+async def get_route_profile(
+    admin: Admin = Depends(require_role(AdminRole.SUPER_ADMIN))
+):
+    """Per-route wall time and sampled event loop time for this worker"""
+    return route_profiler.snapshot()
+
+
+@router.put("/profile/routes")
+async def set_route_profile(
+    request: Request,
+    enabled: bool,
+    reset: bool = False,
+    interval_ms: float = Query(10, ge=1, le=1000),
+    admin: Admin = Depends(require_role(AdminRole.SUPER_ADMIN)),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Turn per-route time accounting on or off in this worker (no restart).
+    Totals are kept when disabled; `reset` clears them.
+    """
+    if enabled:
+        route_profiler.enable(interval_ms / 1000)
+    else:
+        route_profiler.disable()
+    if reset:
+        route_profiler.reset()
+    
+    await create_audit_log(
+        db=db,
+        action="ADMIN_ACTION",
+        actor_type="admin",
+        admin_id=admin.id,
+        resource_type="profiler",
+        description=f"Route profiling {'enabled' if enabled else 'disabled'}{', totals reset' if reset else ''}",
+        ip_address=request.client.host if request.client else None,
+    )
+    
+    return route_profiler.snapshot()
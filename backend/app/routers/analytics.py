@@ -10,9 +10,11 @@ from sqlalchemy import select, func, and_
 from datetime import datetime, timedelta
 from typing import Optional
 from decimal import Decimal
+import asyncio
 import json
 
-from app.database import get_db
+from app.config import settings
+from app.database import engine, get_db
 from app.models.session import KioskSession
 from app.models.payment import Payment, PaymentStatus
 from app.models.grievance import Grievance, GrievanceStatus
@@ -21,9 +23,12 @@ from app.models.bill import Bill, BillStatus
 from app.models.user import User
 from app.middleware.auth import get_current_admin
 from app.utils.generators import generate_session_id
+from app.utils.result_cache import SingleFlightCache
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
+dashboard_cache = SingleFlightCache(ttl=settings.DASHBOARD_CACHE_TTL_SECONDS)
+
 
 @router.post("/session/start")
 async def start_session(
@@ -125,175 +130,145 @@ async def end_session(
     }
 
 
-@router.get("/dashboard")
-async def get_dashboard_stats(
-    admin = Depends(get_current_admin),
-    db: AsyncSession = Depends(get_db)
-):
-    """Get admin dashboard statistics"""
-    today = datetime.utcnow().date()
-    today_start = datetime.combine(today, datetime.min.time())
-    
-    # User stats
-    total_users = await db.execute(select(func.count(User.id)))
-    total_users = total_users.scalar() or 0
-    
-    # Active sessions today
-    active_sessions = await db.execute(
-        select(func.count(KioskSession.id)).where(
-            and_(
-                KioskSession.started_at >= today_start,
-                KioskSession.ended_at == None
-            )
-        )
+async def _fetch_all(stmt) -> list:
+    """Run one statement on its own pooled connection"""
+    async with engine.connect() as conn:
+        result = await conn.execute(stmt)
+        return result.all()
+
+
+async def _load_dashboard_stats(today_start: datetime) -> dict:
+    """
+    Dashboard figures from one aggregate query per table, run concurrently.
+    Each table is scanned once, with FILTER (WHERE ...) clauses computing
+    its different counts in the same pass.
+    """
+    ended = KioskSession.ended_at != None
+    pending_grievance = Grievance.status.in_([
+        GrievanceStatus.SUBMITTED, GrievanceStatus.ACKNOWLEDGED,
+        GrievanceStatus.IN_PROGRESS, GrievanceStatus.ESCALATED
+    ])
+    resolved_today = and_(
+        Grievance.resolution_date >= today_start,
+        Grievance.status.in_([GrievanceStatus.RESOLVED, GrievanceStatus.CLOSED])
     )
-    active_sessions = active_sessions.scalar() or 0
     
-    # Payments today
-    payments_today = await db.execute(
-        select(func.count(Payment.id), func.sum(Payment.total_amount)).where(
-            and_(
-                Payment.completed_at >= today_start,
-                Payment.status == PaymentStatus.SUCCESS
+    (
+        users,
+        sessions,
+        sessions_today,
+        payments,
+        bills,
+        grievances,
+        connections,
+    ) = await asyncio.gather(
+        _fetch_all(select(func.count(User.id))),
+        _fetch_all(select(
+            func.count(KioskSession.id).filter(
+                and_(KioskSession.started_at >= today_start, KioskSession.ended_at == None)
+            ),
+            func.avg(KioskSession.active_duration_seconds).filter(ended),
+            func.count(KioskSession.id).filter(ended),
+            func.count(KioskSession.id).filter(and_(ended, KioskSession.completed_transaction == False)),
+        )),
+        _fetch_all(
+            select(func.extract('hour', KioskSession.started_at), KioskSession.services_used)
+            .where(KioskSession.started_at >= today_start)
+        ),
+        _fetch_all(
+            select(func.count(Payment.id), func.sum(Payment.total_amount)).where(
+                and_(
+                    Payment.completed_at >= today_start,
+                    Payment.status == PaymentStatus.SUCCESS
+                )
             )
-        )
-    )
-    payments_result = payments_today.first()
-    transactions_today = payments_result[0] or 0
-    revenue_today = payments_result[1] or Decimal(0)
-    
-    # Bill stats
-    pending_bills = await db.execute(
-        select(func.count(Bill.id)).where(
-            Bill.status.in_([BillStatus.PENDING, BillStatus.PARTIALLY_PAID])
-        )
-    )
-    pending_bills = pending_bills.scalar() or 0
-    
-    overdue_bills = await db.execute(
-        select(func.count(Bill.id)).where(Bill.status == BillStatus.OVERDUE)
-    )
-    overdue_bills = overdue_bills.scalar() or 0
-    
-    # Grievance stats
-    total_grievances = await db.execute(
-        select(func.count(Grievance.id))
-    )
-    total_grievances = total_grievances.scalar() or 0
-    
-    pending_grievances = await db.execute(
-        select(func.count(Grievance.id)).where(
-            Grievance.status.in_([
-                GrievanceStatus.SUBMITTED, GrievanceStatus.ACKNOWLEDGED,
-                GrievanceStatus.IN_PROGRESS, GrievanceStatus.ESCALATED
-            ])
-        )
-    )
-    pending_grievances = pending_grievances.scalar() or 0
-    
-    resolved_today = await db.execute(
-        select(func.count(Grievance.id)).where(
-            and_(
-                Grievance.resolution_date >= today_start,
-                Grievance.status.in_([GrievanceStatus.RESOLVED, GrievanceStatus.CLOSED])
+        ),
+        _fetch_all(select(
+            func.count(Bill.id).filter(Bill.status.in_([BillStatus.PENDING, BillStatus.PARTIALLY_PAID])),
+            func.count(Bill.id).filter(Bill.status == BillStatus.OVERDUE),
+        )),
+        # Per category; totals are summed below
+        _fetch_all(
+            select(
+                Grievance.category,
+                func.count(Grievance.id),
+                func.count(Grievance.id).filter(pending_grievance),
+                func.count(Grievance.id).filter(resolved_today),
+            ).group_by(Grievance.category)
+        ),
+        _fetch_all(
+            select(func.count(ConnectionRequest.id)).where(
+                ConnectionRequest.status.notin_([
+                    ConnectionStatus.COMPLETED, ConnectionStatus.REJECTED, ConnectionStatus.CANCELLED
+                ])
             )
-        )
+        ),
     )
-    resolved_today = resolved_today.scalar() or 0
     
-    # Connection stats
-    pending_connections = await db.execute(
-        select(func.count(ConnectionRequest.id)).where(
-            ConnectionRequest.status.notin_([
-                ConnectionStatus.COMPLETED, ConnectionStatus.REJECTED, ConnectionStatus.CANCELLED
-            ])
-        )
-    )
-    pending_connections = pending_connections.scalar() or 0
+    total_users = users[0][0] or 0
+    active_sessions, avg_session, total_sessions, dropped_sessions = sessions[0]
+    transactions_today = payments[0][0] or 0
+    revenue_today = payments[0][1] or Decimal(0)
+    pending_bills, overdue_bills = bills[0]
     
-    # Usage by service (from sessions)
-    services_used = await db.execute(
-        select(KioskSession.services_used).where(
-            KioskSession.started_at >= today_start
-        )
-    )
+    # Usage by service and by hour (from today's sessions)
     service_count = {"electricity": 0, "gas": 0, "water": 0, "grievance": 0, "connection": 0}
-    for row in services_used:
-        if row[0]:
+    usage_by_hour = [0] * 24
+    for hour, services_used in sessions_today:
+        if hour is not None:
+            usage_by_hour[int(hour)] += 1
+        if services_used:
             try:
-                services = json.loads(row[0])
+                services = json.loads(services_used)
                 for s in services:
                     if s in service_count:
                         service_count[s] += 1
             except:
                 pass
     
-    # Usage by hour
-    usage_by_hour = [0] * 24
-    hourly_sessions = await db.execute(
-        select(func.extract('hour', KioskSession.started_at), func.count(KioskSession.id))
-        .where(KioskSession.started_at >= today_start)
-        .group_by(func.extract('hour', KioskSession.started_at))
-    )
-    for row in hourly_sessions:
-        if row[0] is not None:
-            usage_by_hour[int(row[0])] = row[1]
-    
-    # Grievance by category
-    grievance_by_category = await db.execute(
-        select(Grievance.category, func.count(Grievance.id))
-        .group_by(Grievance.category)
-    )
-    category_counts = {str(row[0].value): row[1] for row in grievance_by_category}
-    
-    # Session metrics
-    avg_session = await db.execute(
-        select(func.avg(KioskSession.active_duration_seconds)).where(
-            KioskSession.ended_at != None
-        )
-    )
-    avg_session_duration = int(avg_session.scalar() or 0)
+    category_counts = {str(row[0].value): row[1] for row in grievances}
     
     # Drop-off rate
-    total_sessions = await db.execute(
-        select(func.count(KioskSession.id)).where(KioskSession.ended_at != None)
-    )
-    total_sessions = total_sessions.scalar() or 1
-    
-    dropped_sessions = await db.execute(
-        select(func.count(KioskSession.id)).where(
-            and_(
-                KioskSession.ended_at != None,
-                KioskSession.completed_transaction == False
-            )
-        )
-    )
-    dropped_sessions = dropped_sessions.scalar() or 0
-    drop_off_rate = round(dropped_sessions / total_sessions * 100, 2)
+    drop_off_rate = round((dropped_sessions or 0) / (total_sessions or 1) * 100, 2)
     
     return {
         "total_users": total_users,
-        "active_sessions": active_sessions,
+        "active_sessions": active_sessions or 0,
         "total_transactions_today": transactions_today,
         "revenue_today": float(revenue_today),
-        "pending_bills": pending_bills,
-        "overdue_bills": overdue_bills,
+        "pending_bills": pending_bills or 0,
+        "overdue_bills": overdue_bills or 0,
         "bills_paid_today": transactions_today,
-        "total_grievances": total_grievances,
-        "pending_grievances": pending_grievances,
-        "resolved_today": resolved_today,
+        "total_grievances": sum(row[1] for row in grievances),
+        "pending_grievances": sum(row[2] for row in grievances),
+        "resolved_today": sum(row[3] for row in grievances),
         "avg_resolution_time_hours": 48.5,  # Simulated
-        "pending_connections": pending_connections,
+        "pending_connections": connections[0][0] or 0,
         "connections_approved_today": 0,
         "usage_by_service": service_count,
         "usage_by_hour": usage_by_hour,
         "grievance_by_category": category_counts,
         "kiosk_uptime_percent": 99.5,  # Simulated
-        "avg_session_duration_seconds": avg_session_duration,
+        "avg_session_duration_seconds": int(avg_session or 0),
         "drop_off_rate": drop_off_rate
     }
 
 
+@router.get("/dashboard")
+async def get_dashboard_stats(
+    admin = Depends(get_current_admin)
+):
+    """
+    Get admin dashboard statistics.
+    Cached per worker for DASHBOARD_CACHE_TTL_SECONDS; concurrent requests
+    share one computation.
+    """
+    today = datetime.utcnow().date()
+    today_start = datetime.combine(today, datetime.min.time())
+    
+    return await dashboard_cache.get(today, lambda: _load_dashboard_stats(today_start))
+
+
 @router.get("/reports/export")
 async def export_report(
     report_type: str,
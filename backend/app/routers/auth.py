@@ -4,17 +4,19 @@ Authentication Router
 - JWT token management
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import datetime
+from typing import Optional
 
 from app.database import get_db
 from app.models.user import User
 from app.schemas.user import UserLogin, OTPVerify, TokenResponse, TokenRefresh, UserCreate, UserResponse
-from app.utils.security import generate_otp, verify_otp, create_access_token, create_refresh_token, verify_token
+from app.utils.security import generate_otp, verify_otp, create_access_token, create_refresh_token, verify_token, revoke_token
 from app.utils.encryption import encrypt_data, hash_data, mask_mobile
 from app.utils.audit import create_audit_log
-from app.middleware.auth import get_current_user
+from app.middleware.auth import get_current_user, security
 from app.config import settings
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -39,7 +41,7 @@ async def request_otp(
     user = result.scalar_one_or_none()
     
     # Generate and send OTP
-    otp = generate_otp(login_data.mobile)
+    otp = await generate_otp(login_data.mobile)
     
     # In production, send OTP via SMS gateway
     # For demo, OTP is printed to console
@@ -74,7 +76,7 @@ async def verify_otp_login(
     Creates user account if new.
     """
     # Verify OTP
-    if not verify_otp(verify_data.mobile, verify_data.otp):
+    if not await verify_otp(verify_data.mobile, verify_data.otp):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired OTP"
@@ -135,7 +137,7 @@ async def refresh_token(
     db: AsyncSession = Depends(get_db)
 ):
     """Refresh access token using refresh token"""
-    payload = verify_token(token_data.refresh_token, token_type="refresh")
+    payload = await verify_token(token_data.refresh_token, token_type="refresh")
     
     if not payload:
         raise HTTPException(
@@ -246,10 +248,18 @@ async def update_user_profile(
 @router.post("/logout")
 async def logout(
     request: Request,
+    token_data: Optional[TokenRefresh] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Logout user (invalidate session)"""
+    """Logout user: revoke the access token and, if given, the refresh token"""
+    await revoke_token(await verify_token(credentials.credentials, token_type="access") or {})
+    if token_data:
+        refresh_payload = await verify_token(token_data.refresh_token, token_type="refresh")
+        if refresh_payload and refresh_payload.get("sub") == str(user.id):
+            await revoke_token(refresh_payload)
+    
     await create_audit_log(
         db=db,
         action="LOGOUT",
@@ -258,6 +268,4 @@ async def logout(
         ip_address=request.client.host if request.client else None,
     )
     
-    # In production, you would blacklist the token in Redis
-    
     return {"success": True, "message": "Logged out successfully"}
@@ -4,89 +4,123 @@ Billing Router
 - Pay bills
 - Payment history
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Header, Query
+from fastapi.responses import Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
-from datetime import datetime, date
+from sqlalchemy import select, and_, func, tuple_
+from datetime import datetime, date, timedelta, timezone
 from decimal import Decimal
 from typing import List, Optional
 
+from app.config import settings
 from app.database import get_db
 from app.models.user import User
 from app.models.bill import Bill, BillStatus, UtilityType
 from app.models.payment import Payment, PaymentStatus, PaymentMethod
 from app.schemas.bill import (
     BillResponse, BillListResponse, BillPaymentRequest, 
-    PaymentResponse, PaymentHistoryResponse
+    PaymentResponse, PaymentHistoryResponse,
+    BatchPaymentRequest, BatchPaymentItemResult, BatchPaymentResponse
 )
 from app.middleware.auth import get_current_user
-from app.utils.generators import generate_transaction_id, generate_receipt_number, generate_qr_code
+from app.utils.generators import generate_transaction_id, generate_receipt_number
+from app.utils.receipts import receipt_renderer, receipt_qr_data, receipt_qr_url, MEDIA_TYPES
+from app.utils.pagination import encode_cursor, decode_cursor
 from app.utils.audit import create_audit_log
+from app.utils.payment_chain import append_to_payment_chain, append_many_to_payment_chain
+from app.utils.idempotency import idempotency_store, fingerprint_request, IN_PROGRESS
 
 router = APIRouter(prefix="/bills", tags=["Billing"])
 
 
+def _bill_response(bill: Bill, today: date) -> BillResponse:
+    """Convert a Bill to its response, with overdue/due-in computed against `today`"""
+    is_overdue = bill.due_date < today and bill.status in [BillStatus.PENDING, BillStatus.PARTIALLY_PAID]
+    days_until_due = (bill.due_date - today).days if bill.due_date >= today else None
+    
+    return BillResponse(
+        id=bill.id,
+        bill_number=bill.bill_number,
+        account_number=bill.account_number,
+        utility_type=bill.utility_type,
+        billing_period_start=bill.billing_period_start,
+        billing_period_end=bill.billing_period_end,
+        units_consumed=bill.units_consumed,
+        base_amount=bill.base_amount,
+        taxes=bill.taxes,
+        surcharges=bill.surcharges,
+        late_fee=bill.late_fee,
+        total_amount=bill.total_amount,
+        amount_paid=bill.amount_paid,
+        outstanding_amount=bill.outstanding_amount,
+        bill_date=bill.bill_date,
+        due_date=bill.due_date,
+        status=bill.status,
+        is_overdue=is_overdue,
+        days_until_due=days_until_due
+    )
+
+
 @router.get("/", response_model=BillListResponse)
 async def get_user_bills(
     utility_type: Optional[UtilityType] = None,
     status_filter: Optional[BillStatus] = None,
+    due_from: Optional[date] = None,
+    due_to: Optional[date] = None,
+    summary_only: bool = False,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all bills for current user"""
-    query = select(Bill).where(Bill.user_id == user.id)
-    
+    """
+    Get bills for current user, latest due date first.
+    Totals cover every bill matching the filters and are computed in SQL;
+    the bill list is paged (pass `next_cursor` as `cursor`). With
+    summary_only=true only the totals are returned.
+    """
+    filters = [Bill.user_id == user.id]
     if utility_type:
-        query = query.where(Bill.utility_type == utility_type)
+        filters.append(Bill.utility_type == utility_type)
     if status_filter:
-        query = query.where(Bill.status == status_filter)
-    
-    query = query.order_by(Bill.due_date.desc())
+        filters.append(Bill.status == status_filter)
+    if due_from:
+        filters.append(Bill.due_date >= due_from)
+    if due_to:
+        filters.append(Bill.due_date <= due_to)
     
-    result = await db.execute(query)
-    bills = result.scalars().all()
-    
-    # Calculate total outstanding and utility summary
-    total_outstanding = sum(b.outstanding_amount for b in bills)
-    utility_summary = {}
-    for bill in bills:
-        ut = bill.utility_type.value
-        if ut not in utility_summary:
-            utility_summary[ut] = Decimal(0)
-        utility_summary[ut] += bill.outstanding_amount
+    # Total outstanding and utility summary
+    result = await db.execute(
+        select(Bill.utility_type, func.sum(Bill.outstanding_amount))
+        .where(*filters)
+        .group_by(Bill.utility_type)
+    )
+    utility_summary = {ut.value: total for ut, total in result.all()}
+    total_outstanding = sum(utility_summary.values(), Decimal(0))
     
-    # Convert to response
     bill_responses = []
-    for bill in bills:
-        is_overdue = bill.due_date < date.today() and bill.status in [BillStatus.PENDING, BillStatus.PARTIALLY_PAID]
-        days_until_due = (bill.due_date - date.today()).days if bill.due_date >= date.today() else None
+    next_cursor = None
+    if not summary_only:
+        query = select(Bill).where(*filters)
+        after = decode_cursor(cursor, date, int)
+        if after:
+            query = query.where(tuple_(Bill.due_date, Bill.id) < tuple_(*after))
+        query = query.order_by(Bill.due_date.desc(), Bill.id.desc()).limit(limit)
         
-        bill_responses.append(BillResponse(
-            id=bill.id,
-            bill_number=bill.bill_number,
-            account_number=bill.account_number,
-            utility_type=bill.utility_type,
-            billing_period_start=bill.billing_period_start,
-            billing_period_end=bill.billing_period_end,
-            units_consumed=bill.units_consumed,
-            base_amount=bill.base_amount,
-            taxes=bill.taxes,
-            surcharges=bill.surcharges,
-            late_fee=bill.late_fee,
-            total_amount=bill.total_amount,
-            amount_paid=bill.amount_paid,
-            outstanding_amount=bill.outstanding_amount,
-            bill_date=bill.bill_date,
-            due_date=bill.due_date,
-            status=bill.status,
-            is_overdue=is_overdue,
-            days_until_due=days_until_due
-        ))
+        result = await db.execute(query)
+        bills = result.scalars().all()
+        
+        today = date.today()
+        bill_responses = [_bill_response(bill, today) for bill in bills]
+        
+        if len(bills) == limit:
+            next_cursor = encode_cursor(bills[-1].due_date, bills[-1].id)
     
     return BillListResponse(
         bills=bill_responses,
         total_outstanding=total_outstanding,
-        utility_summary={k: float(v) for k, v in utility_summary.items()}
+        utility_summary={k: float(v) for k, v in utility_summary.items()},
+        next_cursor=next_cursor
     )
 
 
@@ -119,36 +153,14 @@ async def get_bill_details(
         ip_address=request.client.host if request.client else None,
     )
     
-    is_overdue = bill.due_date < date.today() and bill.status in [BillStatus.PENDING, BillStatus.PARTIALLY_PAID]
-    days_until_due = (bill.due_date - date.today()).days if bill.due_date >= date.today() else None
-    
-    return BillResponse(
-        id=bill.id,
-        bill_number=bill.bill_number,
-        account_number=bill.account_number,
-        utility_type=bill.utility_type,
-        billing_period_start=bill.billing_period_start,
-        billing_period_end=bill.billing_period_end,
-        units_consumed=bill.units_consumed,
-        base_amount=bill.base_amount,
-        taxes=bill.taxes,
-        surcharges=bill.surcharges,
-        late_fee=bill.late_fee,
-        total_amount=bill.total_amount,
-        amount_paid=bill.amount_paid,
-        outstanding_amount=bill.outstanding_amount,
-        bill_date=bill.bill_date,
-        due_date=bill.due_date,
-        status=bill.status,
-        is_overdue=is_overdue,
-        days_until_due=days_until_due
-    )
+    return _bill_response(bill, date.today())
 
 
 @router.post("/pay", response_model=PaymentResponse)
 async def pay_bill(
     request: Request,
     payment_data: BillPaymentRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -156,10 +168,55 @@ async def pay_bill(
     Initiate bill payment.
     In production, this would redirect to payment gateway.
     For demo, payment is simulated as successful.
+    
+    With an Idempotency-Key header, a repeated request returns the
+    original response without creating another payment.
     """
-    # Get bill
+    if not idempotency_key:
+        return await process_payment(request, payment_data, user, db)
+    
+    key = f"pay:{user.id}:{idempotency_key}"
+    fingerprint = fingerprint_request(payment_data.model_dump_json())
+    
+    stored = await idempotency_store.reserve(key, fingerprint)
+    if stored:
+        if stored["fingerprint"] != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different payment"
+            )
+        if stored["response"] == IN_PROGRESS:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A payment with this Idempotency-Key is still being processed"
+            )
+        return PaymentResponse.model_validate_json(stored["response"])
+    
+    try:
+        response = await process_payment(request, payment_data, user, db)
+        # Commit before remembering the response, so a replay never
+        # reports a payment that was rolled back
+        await db.commit()
+    except Exception:
+        await idempotency_store.release(key)
+        raise
+    
+    await idempotency_store.complete(key, fingerprint, response.model_dump_json())
+    return response
+
+
+async def process_payment(
+    request: Request,
+    payment_data: BillPaymentRequest,
+    user: User,
+    db: AsyncSession
+) -> PaymentResponse:
+    """Apply one payment to a bill (caller owns the transaction)"""
+    # Get bill, locked until commit so concurrent payments apply in sequence
     result = await db.execute(
-        select(Bill).where(and_(Bill.id == payment_data.bill_id, Bill.user_id == user.id))
+        select(Bill)
+        .where(and_(Bill.id == payment_data.bill_id, Bill.user_id == user.id))
+        .with_for_update()
     )
     bill = result.scalar_one_or_none()
     
@@ -184,27 +241,17 @@ async def pay_bill(
     # Generate transaction details
     transaction_id = generate_transaction_id()
     receipt_number = generate_receipt_number()
+    now = datetime.utcnow()
     
-    # Get previous payment hash for chain
-    last_payment = await db.execute(
-        select(Payment.transaction_hash)
-        .where(Payment.user_id == user.id)
-        .order_by(Payment.id.desc())
-        .limit(1)
+    # Link into the user's payment hash chain
+    transaction_hash, previous_hash = await append_to_payment_chain(
+        db,
+        user_id=user.id,
+        transaction_id=transaction_id,
+        bill_id=bill.id,
+        amount=payment_data.amount,
+        timestamp=now
     )
-    previous_hash = last_payment.scalar_one_or_none()
-    
-    # Compute transaction hash
-    import hashlib
-    import json
-    hash_data = json.dumps({
-        "transaction_id": transaction_id,
-        "bill_id": bill.id,
-        "amount": str(payment_data.amount),
-        "timestamp": datetime.utcnow().isoformat(),
-        "previous_hash": previous_hash or "GENESIS"
-    }, sort_keys=True)
-    transaction_hash = hashlib.sha256(hash_data.encode()).hexdigest()
     
     # Create payment record
     payment = Payment(
@@ -220,24 +267,14 @@ async def pay_bill(
         receipt_number=receipt_number,
         transaction_hash=transaction_hash,
         previous_hash=previous_hash,
-        initiated_at=datetime.utcnow(),
-        completed_at=datetime.utcnow(),
+        initiated_at=now,
+        completed_at=now,
     )
     
-    # Generate QR code for receipt
-    qr_data = f"SUVIDHA|{receipt_number}|{transaction_id}|{payment_data.amount}"
-    payment.receipt_qr_code = generate_qr_code(qr_data)
-    
     db.add(payment)
     
-    # Update bill
-    bill.amount_paid += payment_data.amount
-    bill.outstanding_amount -= payment_data.amount
-    
-    if bill.outstanding_amount <= 0:
-        bill.status = BillStatus.PAID
-    elif bill.amount_paid > 0:
-        bill.status = BillStatus.PARTIALLY_PAID
+    # Update bill (row is locked, so this read-modify-write cannot interleave)
+    _apply_to_bill(bill, payment_data.amount)
     
     await create_audit_log(
         db=db,
@@ -263,30 +300,282 @@ async def pay_bill(
         amount=payment_data.amount,
         status="SUCCESS",
         receipt_number=receipt_number,
-        receipt_qr=payment.receipt_qr_code,
-        payment_time=datetime.utcnow(),
+        receipt_qr=receipt_qr_url(receipt_number),
+        payment_time=now,
         message="Payment successful. Receipt generated."
     )
 
 
+def _apply_to_bill(bill: Bill, amount: Decimal) -> None:
+    """Apply a payment amount to a (locked) bill and update its status"""
+    bill.amount_paid += amount
+    bill.outstanding_amount -= amount
+    
+    if bill.outstanding_amount <= 0:
+        bill.status = BillStatus.PAID
+    elif bill.amount_paid > 0:
+        bill.status = BillStatus.PARTIALLY_PAID
+
+
+def _offline_timestamp(queued_at: Optional[datetime], now: datetime) -> datetime:
+    """
+    When a queued payment was taken, as naive UTC like the Payment columns.
+    Kiosks send ISO strings with an offset; the value is clamped to the
+    offline window so a client cannot future-date or backdate chain entries.
+    """
+    if queued_at is None:
+        return now
+    if queued_at.tzinfo is not None:
+        queued_at = queued_at.astimezone(timezone.utc).replace(tzinfo=None)
+    earliest = now - timedelta(hours=settings.OFFLINE_PAYMENT_MAX_AGE_HOURS)
+    return min(max(queued_at, earliest), now)
+
+
+@router.post("/pay/batch", response_model=BatchPaymentResponse)
+async def pay_bills_batch(
+    request: Request,
+    batch: BatchPaymentRequest,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Sync a kiosk's offline payment queue in one request.
+    Items are applied in order in a single transaction; an item that
+    fails validation is reported and skipped without affecting the rest.
+    Items with an idempotency_key that was already synced are returned
+    as DUPLICATE with the original payment.
+    """
+    now = datetime.utcnow()
+    results = {}
+    claimed = {}  # index -> (key, fingerprint)
+    
+    # Replays of already-synced items
+    for index, item in enumerate(batch.payments):
+        if not item.idempotency_key:
+            continue
+        key = f"pay:{user.id}:{item.idempotency_key}"
+        fingerprint = fingerprint_request(
+            BillPaymentRequest(
+                bill_id=item.bill_id, amount=item.amount, payment_method=item.payment_method
+            ).model_dump_json()
+        )
+        stored = await idempotency_store.reserve(key, fingerprint)
+        if not stored:
+            claimed[index] = (key, fingerprint)
+        elif stored["fingerprint"] != fingerprint:
+            results[index] = BatchPaymentItemResult(
+                index=index, status="FAILED",
+                error="Idempotency-Key was already used for a different payment"
+            )
+        elif stored["response"] == IN_PROGRESS:
+            results[index] = BatchPaymentItemResult(
+                index=index, status="FAILED",
+                error="A payment with this Idempotency-Key is still being processed"
+            )
+        else:
+            results[index] = BatchPaymentItemResult(
+                index=index, status="DUPLICATE",
+                payment=PaymentResponse.model_validate_json(stored["response"])
+            )
+    
+    try:
+        # Validate against all referenced bills in one query, locked in id
+        # order so concurrent batches cannot deadlock
+        bill_ids = {item.bill_id for index, item in enumerate(batch.payments) if index not in results}
+        bills = {}
+        if bill_ids:
+            result = await db.execute(
+                select(Bill)
+                .where(and_(Bill.id.in_(bill_ids), Bill.user_id == user.id))
+                .order_by(Bill.id)
+                .with_for_update()
+            )
+            bills = {bill.id: bill for bill in result.scalars().all()}
+        
+        accepted = []
+        for index, item in enumerate(batch.payments):
+            if index in results:
+                continue
+            bill = bills.get(item.bill_id)
+            error = None
+            if not bill:
+                error = "Bill not found"
+            elif bill.status == BillStatus.PAID:
+                error = "Bill is already paid"
+            elif item.amount > bill.outstanding_amount:
+                error = "Payment amount exceeds outstanding balance"
+            
+            if error:
+                results[index] = BatchPaymentItemResult(index=index, status="FAILED", error=error)
+                continue
+            
+            _apply_to_bill(bill, item.amount)
+            accepted.append((index, item, bill, {
+                "transaction_id": generate_transaction_id(),
+                "bill_id": bill.id,
+                "amount": item.amount,
+                "timestamp": _offline_timestamp(item.queued_at, now),
+            }))
+        
+        if accepted:
+            links = await append_many_to_payment_chain(db, user.id, [a[3] for a in accepted])
+            
+            payments = []
+            for (index, item, bill, details), (transaction_hash, previous_hash) in zip(accepted, links):
+                transaction_id = details["transaction_id"]
+                receipt_number = generate_receipt_number()
+                payment = Payment(
+                    transaction_id=transaction_id,
+                    gateway_transaction_id=f"SIM_{transaction_id}",  # Simulated
+                    user_id=user.id,
+                    bill_id=bill.id,
+                    amount=item.amount,
+                    convenience_fee=Decimal("0"),
+                    total_amount=item.amount,
+                    payment_method=PaymentMethod(item.payment_method),
+                    status=PaymentStatus.SUCCESS,  # Simulated success
+                    receipt_number=receipt_number,
+                    transaction_hash=transaction_hash,
+                    previous_hash=previous_hash,
+                    initiated_at=details["timestamp"],
+                    completed_at=now,
+                    is_offline=True,
+                    synced_at=now,
+                )
+                payments.append(payment)
+                
+                results[index] = BatchPaymentItemResult(
+                    index=index,
+                    status="SUCCESS",
+                    payment=PaymentResponse(
+                        transaction_id=transaction_id,
+                        bill_id=bill.id,
+                        amount=item.amount,
+                        status="SUCCESS",
+                        receipt_number=receipt_number,
+                        receipt_qr=receipt_qr_url(receipt_number),
+                        payment_time=now,
+                        message="Offline payment synced. Receipt generated."
+                    )
+                )
+            
+            db.add_all(payments)
+            await db.flush()
+            
+            for (index, item, bill, details), payment in zip(accepted, payments):
+                await create_audit_log(
+                    db=db,
+                    action="BILL_PAYMENT_SUCCESS",
+                    actor_type="user",
+                    user_id=user.id,
+                    resource_type="payment",
+                    resource_id=payment.id,
+                    description=f"Offline payment of Rs.{item.amount} for bill {bill.bill_number}",
+                    ip_address=request.client.host if request.client else None,
+                    kiosk_id=request.headers.get("X-Kiosk-ID"),
+                    metadata={
+                        "transaction_id": payment.transaction_id,
+                        "bill_number": bill.bill_number,
+                        "amount": str(item.amount),
+                        "offline": True
+                    }
+                )
+        
+        await db.commit()
+    except Exception:
+        for key, _ in claimed.values():
+            await idempotency_store.release(key)
+        raise
+    
+    for index, (key, fingerprint) in claimed.items():
+        item_result = results[index]
+        if item_result.status == "SUCCESS":
+            await idempotency_store.complete(key, fingerprint, item_result.payment.model_dump_json())
+        else:
+            await idempotency_store.release(key)
+    
+    ordered = [results[index] for index in range(len(batch.payments))]
+    failed = sum(1 for r in ordered if r.status == "FAILED")
+    return BatchPaymentResponse(
+        results=ordered,
+        succeeded=len(ordered) - failed,
+        failed=failed
+    )
+
+
+@router.get("/receipts/{receipt_number}/qr")
+async def get_receipt_qr(
+    receipt_number: str,
+    image_format: str = Query("png", alias="format", pattern="^(png|svg)$"),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Receipt QR code image (PNG or SVG).
+    Rendered on first request off the event loop, then served from cache.
+    """
+    cached = receipt_renderer.get_cached(receipt_number, image_format)
+    if cached is not None and cached[0] == user.id:
+        image = cached[1]
+    else:
+        result = await db.execute(
+            select(Payment.transaction_id, Payment.total_amount).where(
+                and_(Payment.receipt_number == receipt_number, Payment.user_id == user.id)
+            )
+        )
+        payment = result.first()
+        
+        if not payment:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Receipt not found"
+            )
+        
+        image = await receipt_renderer.render(
+            receipt_number,
+            image_format,
+            user.id,
+            receipt_qr_data(receipt_number, payment.transaction_id, payment.total_amount)
+        )
+    
+    return Response(
+        content=image,
+        media_type=MEDIA_TYPES[image_format],
+        headers={"Cache-Control": "private, max-age=86400, immutable"}
+    )
+
+
 @router.get("/history/all", response_model=List[PaymentHistoryResponse])
 async def get_payment_history(
-    limit: int = 20,
-    offset: int = 0,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get payment history for current user"""
-    result = await db.execute(
+    """
+    Get payment history for current user, newest first.
+    Pass the X-Next-Cursor response header as `cursor` to get the next page.
+    """
+    query = (
         select(Payment, Bill)
         .join(Bill, Payment.bill_id == Bill.id)
         .where(Payment.user_id == user.id)
-        .order_by(Payment.initiated_at.desc())
-        .limit(limit)
-        .offset(offset)
+    )
+    
+    after = decode_cursor(cursor, datetime, int)
+    if after:
+        query = query.where(tuple_(Payment.initiated_at, Payment.id) < tuple_(*after))
+    
+    result = await db.execute(
+        query.order_by(Payment.initiated_at.desc(), Payment.id.desc()).limit(limit)
     )
     payments = result.all()
     
+    if len(payments) == limit:
+        last = payments[-1].Payment
+        response.headers["X-Next-Cursor"] = encode_cursor(last.initiated_at, last.id)
+    
     return [
         PaymentHistoryResponse(
             transaction_id=p.Payment.transaction_id,
@@ -5,7 +5,8 @@ from app.schemas.user import (
     UserCreate, UserUpdate, UserResponse, UserLogin, OTPVerify, TokenResponse, TokenRefresh
 )
 from app.schemas.bill import (
-    BillResponse, BillListResponse, BillPaymentRequest, PaymentResponse, PaymentHistoryResponse
+    BillResponse, BillListResponse, BillPaymentRequest, PaymentResponse, PaymentHistoryResponse,
+    OfflinePaymentItem, BatchPaymentRequest, BatchPaymentItemResult, BatchPaymentResponse
 )
 from app.schemas.grievance import (
     GrievanceCreate, GrievanceUpdate, GrievanceResponse, GrievanceListResponse, GrievanceTrack
@@ -31,6 +32,7 @@ __all__ = [
     "UserCreate", "UserUpdate", "UserResponse", "UserLogin", "OTPVerify", "TokenResponse", "TokenRefresh",
     # Bill
     "BillResponse", "BillListResponse", "BillPaymentRequest", "PaymentResponse", "PaymentHistoryResponse",
+    "OfflinePaymentItem", "BatchPaymentRequest", "BatchPaymentItemResult", "BatchPaymentResponse",
     # Grievance
     "GrievanceCreate", "GrievanceUpdate", "GrievanceResponse", "GrievanceListResponse", "GrievanceTrack",
     # Connection
@@ -64,6 +64,7 @@ class BillListResponse(BaseModel):
     bills: List[BillResponse]
     total_outstanding: Decimal
     utility_summary: dict  # { "electricity": 1500, "gas": 500 }
+    next_cursor: Optional[str] = None  # Cursor for the next page of bills
 
 
 class BillPaymentRequest(BaseModel):
@@ -81,7 +82,7 @@ class PaymentResponse(BaseModel):
     amount: Decimal
     status: str
     receipt_number: Optional[str]
-    receipt_qr: Optional[str]  # Base64 QR code
+    receipt_qr: Optional[str]  # URL of the receipt QR image
     payment_time: datetime
     message: str
     
@@ -102,3 +103,32 @@ class PaymentHistoryResponse(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class OfflinePaymentItem(BaseModel):
+    """Payment queued on a kiosk while offline"""
+    bill_id: int
+    amount: Decimal = Field(..., gt=0)
+    payment_method: PaymentMethod
+    idempotency_key: Optional[str] = Field(None, max_length=255)
+    queued_at: Optional[datetime] = None  # When the kiosk accepted the payment
+
+
+class BatchPaymentRequest(BaseModel):
+    """Ordered offline payments to sync in one request"""
+    payments: List[OfflinePaymentItem] = Field(..., min_length=1, max_length=100)
+
+
+class BatchPaymentItemResult(BaseModel):
+    """Outcome of one item in a batch sync"""
+    index: int
+    status: str  # SUCCESS, DUPLICATE, FAILED
+    payment: Optional[PaymentResponse] = None
+    error: Optional[str] = None
+
+
+class BatchPaymentResponse(BaseModel):
+    """Per-item results of a batch sync, in request order"""
+    results: List[BatchPaymentItemResult]
+    succeeded: int
+    failed: int
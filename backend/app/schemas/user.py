@@ -34,7 +34,7 @@ class OTPVerify(BaseModel):
     @field_validator('otp')
     @classmethod
     def validate_otp(cls, v):
-        if not v.isdigit():
+        if not (v.isascii() and v.isdigit()):
             raise ValueError('OTP must contain only digits')
         return v
 
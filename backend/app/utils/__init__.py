@@ -4,6 +4,8 @@ Utility Functions for SUVIDHA
 from app.utils.security import (
     hash_password,
     verify_password,
+    hash_password_async,
+    verify_password_async,
     create_access_token,
     create_refresh_token,
     verify_token,
@@ -21,22 +23,47 @@ from app.utils.generators import (
     generate_receipt_number,
     generate_transaction_id,
     generate_qr_code,
+    render_qr_image,
 )
 from app.utils.audit import (
     create_audit_log,
     compute_log_hash,
 )
+from app.utils.audit_writer import (
+    AuditWriter,
+    audit_writer,
+)
+from app.utils.redis_client import (
+    RedisManager,
+    redis_manager,
+    get_redis,
+)
+from app.utils.principal_cache import (
+    PrincipalCache,
+    principal_cache,
+)
+from app.utils.logging_setup import (
+    JSONFormatter,
+    setup_logging,
+    shutdown_logging,
+)
 
 __all__ = [
     # Security
-    "hash_password", "verify_password",
+    "hash_password", "verify_password", "hash_password_async", "verify_password_async",
     "create_access_token", "create_refresh_token", "verify_token",
     "generate_otp", "verify_otp",
     # Encryption
     "encrypt_data", "decrypt_data", "hash_data",
     # Generators
     "generate_tracking_id", "generate_application_number",
-    "generate_receipt_number", "generate_transaction_id", "generate_qr_code",
+    "generate_receipt_number", "generate_transaction_id", "generate_qr_code", "render_qr_image",
     # Audit
-    "create_audit_log", "compute_log_hash",
+    "create_audit_log", "compute_log_hash", "AuditWriter", "audit_writer",
+    # Redis
+    "RedisManager", "redis_manager", "get_redis",
+    # Principal cache
+    "PrincipalCache", "principal_cache",
+    # Logging
+    "JSONFormatter", "setup_logging", "shutdown_logging",
 ]
@@ -3,17 +3,45 @@ Audit logging utilities with hash chain
 """
 import hashlib
 import json
+import time
 from datetime import datetime
 from typing import Optional, Any
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
+from sqlalchemy import select, desc, func
 
+from app.config import settings
+from app.models.audit_log import ROOT_CHAIN_ID
+from app.metrics import audit_write_duration
 
-async def get_last_log_hash(db: AsyncSession) -> Optional[str]:
-    """Get hash of the last audit log entry"""
+# Actions written inline in the caller's transaction even while the
+# group-commit writer runs, so they commit or roll back with what they record
+TRANSACTIONAL_ACTIONS = frozenset({
+    "LOGIN", "LOGIN_FAILED", "LOGOUT", "TOKEN_REFRESH", "ADMIN_LOGIN",
+    "BILL_PAYMENT_INITIATED", "BILL_PAYMENT_SUCCESS", "BILL_PAYMENT_FAILED",
+    "SETTINGS_CHANGED", "PII_ACCESSED", "DATA_EXPORTED",
+})
+
+
+async def lock_chain(db: AsyncSession, chain_id: str) -> None:
+    """
+    Hold a chain's append lock until the transaction ends, so the head read
+    next is still the head at commit, whichever worker appends.
+    A transaction-scoped advisory lock on PostgreSQL; SQLite (tests) has a
+    single writer anyway.
+    """
+    connection = await db.connection()
+    if connection.dialect.name == "postgresql":
+        await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(f"audit_chain:{chain_id}"))))
+
+
+async def get_last_log_hash(db: AsyncSession, chain_id: Optional[str] = None) -> Optional[str]:
+    """Get hash of the last audit log entry in a chain (root chain by default)"""
     from app.models.audit_log import AuditLog
     result = await db.execute(
-        select(AuditLog.log_hash).order_by(desc(AuditLog.id)).limit(1)
+        select(AuditLog.log_hash)
+        .where(AuditLog.chain_id == (chain_id or ROOT_CHAIN_ID))
+        .order_by(desc(AuditLog.id))
+        .limit(1)
     )
     row = result.scalar_one_or_none()
     return row
@@ -27,9 +55,14 @@ def compute_log_hash(
     resource_id: Optional[int],
     timestamp: datetime,
     previous_hash: Optional[str],
-    metadata: Optional[dict] = None
+    metadata: Optional[dict] = None,
+    chain_id: Optional[str] = None
 ) -> str:
-    """Compute SHA-256 hash for audit log entry (immutable chain)"""
+    """
+    Compute SHA-256 hash for audit log entry (immutable chain).
+    Entries on a shard chain also commit to their chain_id; root chain
+    hashes are unchanged from the unsharded format.
+    """
     data = {
         "action": action,
         "actor_type": actor_type,
@@ -40,14 +73,32 @@ def compute_log_hash(
         "previous_hash": previous_hash or "GENESIS",
         "metadata": metadata or {}
     }
-    
+    if chain_id and chain_id != ROOT_CHAIN_ID:
+        data["chain_id"] = chain_id
+
     # Serialize deterministically
     json_str = json.dumps(data, sort_keys=True, default=str)
     return hashlib.sha256(json_str.encode()).hexdigest()
 
 
-async def create_audit_log(
-    db: AsyncSession,
+def resolve_chain_id(
+    actor_type: str,
+    actor_id: Optional[int],
+    resource_type: Optional[str],
+    kiosk_id: Optional[str],
+) -> str:
+    """Pick the hash chain shard for an entry according to AUDIT_CHAIN_SHARDING"""
+    mode = settings.AUDIT_CHAIN_SHARDING
+    if mode == "kiosk" and kiosk_id:
+        return f"kiosk:{kiosk_id}"
+    if mode == "user_bucket" and actor_id is not None:
+        return f"{actor_type}:{actor_id % settings.AUDIT_CHAIN_USER_BUCKETS}"
+    if mode == "resource_type" and resource_type:
+        return f"resource:{resource_type}"
+    return ROOT_CHAIN_ID
+
+
+def build_audit_entry(
     action: str,
     actor_type: str = "system",
     user_id: Optional[int] = None,
@@ -59,46 +110,111 @@ async def create_audit_log(
     user_agent: Optional[str] = None,
     kiosk_id: Optional[str] = None,
     session_id: Optional[str] = None,
-    metadata: Optional[dict] = None
-) -> None:
-    """Create an immutable audit log entry"""
-    from app.models.audit_log import AuditLog, AuditAction
-    
-    # Get previous hash for chain
-    previous_hash = await get_last_log_hash(db)
-    
-    # Compute hash for this entry
-    timestamp = datetime.utcnow()
-    actor_id = admin_id if actor_type == "admin" else user_id
+    metadata: Optional[dict] = None,
+    chain_id: Optional[str] = None
+) -> dict:
+    """Capture an audit event (timestamped now) before it is linked into the chain"""
+    if chain_id is None:
+        actor_id = admin_id if actor_type == "admin" else user_id
+        chain_id = resolve_chain_id(actor_type, actor_id, resource_type, kiosk_id)
+    return {
+        "action": action,
+        "description": description,
+        "user_id": user_id,
+        "admin_id": admin_id,
+        "actor_type": actor_type,
+        "resource_type": resource_type,
+        "resource_id": resource_id,
+        "ip_address": ip_address,
+        "user_agent": user_agent,
+        "kiosk_id": kiosk_id,
+        "session_id": session_id,
+        "metadata": metadata,
+        "chain_id": chain_id,
+        "created_at": datetime.utcnow(),
+    }
+
+
+def chain_audit_entry(entry: dict, previous_hash: Optional[str]) -> dict:
+    """Link an entry to the chain and return the AuditLog column values"""
+    from app.models.audit_log import AuditAction
+
+    action = entry["action"]
+    actor_id = entry["admin_id"] if entry["actor_type"] == "admin" else entry["user_id"]
     log_hash = compute_log_hash(
         action=action,
-        actor_type=actor_type,
+        actor_type=entry["actor_type"],
         actor_id=actor_id,
-        resource_type=resource_type,
-        resource_id=resource_id,
-        timestamp=timestamp,
+        resource_type=entry["resource_type"],
+        resource_id=entry["resource_id"],
+        timestamp=entry["created_at"],
         previous_hash=previous_hash,
-        metadata=metadata
+        metadata=entry["metadata"],
+        chain_id=entry["chain_id"]
     )
-    
-    # Create log entry
-    log_entry = AuditLog(
-        action=AuditAction(action) if action in AuditAction.__members__ else AuditAction.ADMIN_ACTION,
-        description=description,
+
+    row = dict(entry)
+    row["action"] = AuditAction[action] if action in AuditAction.__members__ else AuditAction.ADMIN_ACTION
+    metadata = row.pop("metadata")
+    row["log_metadata"] = json.dumps(metadata) if metadata else None
+    row["log_hash"] = log_hash
+    row["previous_hash"] = previous_hash
+    return row
+
+
+async def create_audit_log(
+    db: AsyncSession,
+    action: str,
+    actor_type: str = "system",
+    user_id: Optional[int] = None,
+    admin_id: Optional[int] = None,
+    resource_type: Optional[str] = None,
+    resource_id: Optional[int] = None,
+    description: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None,
+    kiosk_id: Optional[str] = None,
+    session_id: Optional[str] = None,
+    metadata: Optional[dict] = None,
+    wait: Optional[bool] = None
+) -> None:
+    """
+    Create an immutable audit log entry.
+
+    When the group-commit writer is running the entry is queued and written
+    in the next batch; `wait` (default: AUDIT_DURABLE) blocks until that
+    batch has committed. Otherwise, and always for TRANSACTIONAL_ACTIONS,
+    the entry is chained and flushed inline on the caller's session; its
+    chain stays locked until the caller's transaction ends.
+    """
+    from app.models.audit_log import AuditLog
+    from app.utils.audit_writer import audit_writer
+
+    entry = build_audit_entry(
+        action=action,
+        actor_type=actor_type,
         user_id=user_id,
         admin_id=admin_id,
-        actor_type=actor_type,
         resource_type=resource_type,
         resource_id=resource_id,
+        description=description,
         ip_address=ip_address,
         user_agent=user_agent,
         kiosk_id=kiosk_id,
         session_id=session_id,
-        metadata=json.dumps(metadata) if metadata else None,
-        log_hash=log_hash,
-        previous_hash=previous_hash,
-        created_at=timestamp
+        metadata=metadata
     )
-    
-    db.add(log_entry)
+
+    start = time.perf_counter()
+    if audit_writer.running and action not in TRANSACTIONAL_ACTIONS:
+        await audit_writer.submit(entry, wait=settings.AUDIT_DURABLE if wait is None else wait)
+        audit_write_duration.observe(time.perf_counter() - start, "queued")
+        return
+
+    # Get previous hash for chain
+    await lock_chain(db, entry["chain_id"])
+    previous_hash = await get_last_log_hash(db, entry["chain_id"])
+
+    db.add(AuditLog(**chain_audit_entry(entry, previous_hash)))
     await db.flush()
+    audit_write_duration.observe(time.perf_counter() - start, "inline")
@@ -0,0 +1,151 @@
+"""
+Merkle checkpoints over audit log segments
+
+audit_logs is cut into fixed-size id segments. Once a segment has been
+verified, a Merkle root over its log_hash values is stored in
+audit_merkle_checkpoints. An inclusion proof for one entry is the list
+of sibling hashes from its leaf to the segment root, so it can be
+checked in O(log segment size) without walking the chain.
+
+Leaves and inner nodes are domain-separated (0x00 / 0x01 prefix); an
+unpaired node at the end of a level is promoted unchanged.
+"""
+import hashlib
+from typing import Optional, List
+
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.audit_log import AuditLog, AuditMerkleCheckpoint
+
+
+def _hash_leaf(log_hash: str) -> bytes:
+    return hashlib.sha256(b"\x00" + bytes.fromhex(log_hash)).digest()
+
+
+def _hash_node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def _next_level(level: List[bytes]) -> List[bytes]:
+    parents = [_hash_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+    if len(level) % 2:
+        parents.append(level[-1])
+    return parents
+
+
+def merkle_root(log_hashes: List[str]) -> str:
+    """Compute the Merkle root over log hashes (in id order)"""
+    level = [_hash_leaf(h) for h in log_hashes]
+    while len(level) > 1:
+        level = _next_level(level)
+    return level[0].hex()
+
+
+def merkle_proof(log_hashes: List[str], index: int) -> List[dict]:
+    """Sibling path from leaf `index` to the root"""
+    proof = []
+    level = [_hash_leaf(h) for h in log_hashes]
+    while len(level) > 1:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append({
+                "hash": level[sibling].hex(),
+                "position": "left" if sibling < index else "right"
+            })
+        level = _next_level(level)
+        index //= 2
+    return proof
+
+
+def verify_merkle_proof(log_hash: str, proof: List[dict], root: str) -> bool:
+    """Check that `log_hash` is included under `root` via `proof`"""
+    node = _hash_leaf(log_hash)
+    for step in proof:
+        sibling = bytes.fromhex(step["hash"])
+        node = _hash_node(sibling, node) if step["position"] == "left" else _hash_node(node, sibling)
+    return node.hex() == root
+
+
+def segment_bounds(segment_index: int, segment_size: int) -> tuple:
+    """First and last audit log id covered by a segment"""
+    return segment_index * segment_size + 1, (segment_index + 1) * segment_size
+
+
+async def _segment_hashes(db: AsyncSession, first_id: int, last_id: int) -> List[tuple]:
+    result = await db.execute(
+        select(AuditLog.id, AuditLog.log_hash)
+        .where(AuditLog.id.between(first_id, last_id))
+        .order_by(AuditLog.id)
+    )
+    return result.all()
+
+
+async def seal_merkle_segments(db: AsyncSession, up_to_id: int) -> int:
+    """
+    Store Merkle checkpoints for every complete segment ending at or
+    before `up_to_id` that is not sealed yet. Returns segments sealed.
+    """
+    segment_size = settings.AUDIT_MERKLE_SEGMENT_SIZE
+
+    result = await db.execute(select(func.max(AuditMerkleCheckpoint.segment_index)))
+    last_sealed = result.scalar()
+    segment_index = 0 if last_sealed is None else last_sealed + 1
+
+    sealed = 0
+    while True:
+        first_id, last_id = segment_bounds(segment_index, segment_size)
+        if last_id > up_to_id:
+            break
+
+        rows = await _segment_hashes(db, first_id, last_id)
+        if rows:
+            db.add(AuditMerkleCheckpoint(
+                segment_index=segment_index,
+                first_log_id=rows[0].id,
+                last_log_id=rows[-1].id,
+                leaf_count=len(rows),
+                merkle_root=merkle_root([row.log_hash for row in rows]),
+            ))
+            sealed += 1
+        segment_index += 1
+
+    if sealed:
+        await db.flush()
+    return sealed
+
+
+async def get_inclusion_proof(db: AsyncSession, log_id: int) -> Optional[dict]:
+    """
+    Inclusion proof for one audit entry against its segment checkpoint.
+    Returns None if the entry does not exist or its segment is not sealed.
+    """
+    segment_size = settings.AUDIT_MERKLE_SEGMENT_SIZE
+    segment_index = (log_id - 1) // segment_size
+
+    result = await db.execute(
+        select(AuditMerkleCheckpoint).where(AuditMerkleCheckpoint.segment_index == segment_index)
+    )
+    checkpoint = result.scalar_one_or_none()
+    if not checkpoint:
+        return None
+
+    rows = await _segment_hashes(db, checkpoint.first_log_id, checkpoint.last_log_id)
+    ids = [row.id for row in rows]
+    if log_id not in ids:
+        return None
+
+    leaf_index = ids.index(log_id)
+    log_hashes = [row.log_hash for row in rows]
+
+    return {
+        "log_id": log_id,
+        "log_hash": log_hashes[leaf_index],
+        "segment_index": segment_index,
+        "leaf_index": leaf_index,
+        "leaf_count": checkpoint.leaf_count,
+        "merkle_root": checkpoint.merkle_root,
+        "checkpoint_created_at": checkpoint.created_at.isoformat(),
+        "proof": merkle_proof(log_hashes, leaf_index),
+    }
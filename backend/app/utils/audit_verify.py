@@ -0,0 +1,224 @@
+"""
+Streaming audit chain verification
+
+Rows are streamed from audit_logs in id order through a server-side
+cursor, hashes are recomputed in batches on a process pool, and chain
+linkage (previous_hash of each row == last hash of its chain) is checked
+sequentially in the main process. Each run records a checkpoint so the
+next run only verifies rows written since, and seals Merkle checkpoints
+for segments that are now fully verified.
+
+Concurrent writers (several writer lanes, inline writes) commit out of id
+order, so a lower id can still become visible after a run has passed it.
+The checkpoint therefore stops at the first row newer than
+AUDIT_VERIFY_SETTLE_SECONDS; later rows are checked and reported but
+verified again by the next run.
+"""
+import asyncio
+import json
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, List, Dict
+
+from sqlalchemy import select, desc
+
+from app.config import settings
+from app.models.audit_log import AuditLog, AuditVerificationCheckpoint
+from app.utils.audit import compute_log_hash
+from app.utils.audit_merkle import seal_merkle_segments
+
+# Stop scanning once this many problems have been found
+MAX_REPORTED_FAILURES = 100
+
+_COLUMNS = (
+    AuditLog.id,
+    AuditLog.chain_id,
+    AuditLog.action,
+    AuditLog.actor_type,
+    AuditLog.user_id,
+    AuditLog.admin_id,
+    AuditLog.resource_type,
+    AuditLog.resource_id,
+    AuditLog.created_at,
+    AuditLog.log_metadata,
+    AuditLog.log_hash,
+    AuditLog.previous_hash,
+)
+
+
+def _verify_hashes(rows: List[tuple]) -> List[int]:
+    """Recompute hashes for a batch of rows; returns ids that do not match"""
+    mismatched = []
+    for (
+        log_id, chain_id, action, actor_type, user_id, admin_id,
+        resource_type, resource_id, created_at, metadata, log_hash, previous_hash
+    ) in rows:
+        expected = compute_log_hash(
+            action=action,
+            actor_type=actor_type,
+            actor_id=admin_id if actor_type == "admin" else user_id,
+            resource_type=resource_type,
+            resource_id=resource_id,
+            timestamp=created_at,
+            previous_hash=previous_hash,
+            metadata=json.loads(metadata) if metadata else None,
+            chain_id=chain_id
+        )
+        if expected != log_hash:
+            mismatched.append(log_id)
+    return mismatched
+
+
+class AuditChainVerifier:
+    """Single verification run over audit_logs"""
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        full: bool = False,
+    ):
+        self.batch_size = batch_size or settings.AUDIT_VERIFY_BATCH_SIZE
+        self.workers = workers if workers is not None else settings.AUDIT_VERIFY_WORKERS
+        self.full = full
+
+        self.start_id = 0
+        self.verified_up_to_id = 0
+        self.rows_scanned = 0
+        self.rows_verified = 0
+        self.failures: List[dict] = []
+        # Last hash seen per chain, and the same as of verified_up_to_id
+        self.heads: Dict[str, Optional[str]] = {}
+        self.verified_heads: Dict[str, Optional[str]] = {}
+        # Rows created after this may still have lower-id rows in flight
+        self.settle_cutoff = datetime.utcnow() - timedelta(seconds=settings.AUDIT_VERIFY_SETTLE_SECONDS)
+        self.settled = True
+
+    async def _load_checkpoint(self) -> None:
+        from app.database import async_session_maker
+
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(AuditVerificationCheckpoint)
+                .order_by(desc(AuditVerificationCheckpoint.id))
+                .limit(1)
+            )
+            checkpoint = result.scalar_one_or_none()
+
+        if checkpoint:
+            self.start_id = checkpoint.verified_up_to_id
+            self.heads = json.loads(checkpoint.chain_heads)
+        self.verified_up_to_id = self.start_id
+        self.verified_heads = dict(self.heads)
+
+    def _settle(self, rows: List[tuple], mismatched: List[int]) -> None:
+        """
+        Check linkage for a batch in id order and advance the verified mark,
+        which stays contiguous and behind the settle cutoff
+        """
+        mismatched = set(mismatched)
+        for row in rows:
+            log_id, chain_id, created_at, log_hash, previous_hash = row[0], row[1], row[8], row[10], row[11]
+            self.rows_scanned += 1
+            if created_at > self.settle_cutoff:
+                self.settled = False
+
+            if previous_hash != self.heads.get(chain_id):
+                self.failures.append({"id": log_id, "chain_id": chain_id, "reason": "broken_link"})
+            elif log_id in mismatched:
+                self.failures.append({"id": log_id, "chain_id": chain_id, "reason": "hash_mismatch"})
+            elif not self.failures and self.settled:
+                self.rows_verified += 1
+                self.verified_up_to_id = log_id
+                self.verified_heads[chain_id] = log_hash
+
+            self.heads[chain_id] = log_hash
+
+    async def run(self) -> dict:
+        from app.database import engine
+
+        started = time.perf_counter()
+        if not self.full:
+            await self._load_checkpoint()
+
+        query = (
+            select(*_COLUMNS)
+            .where(AuditLog.id > self.start_id)
+            .order_by(AuditLog.id)
+            .execution_options(yield_per=self.batch_size)
+        )
+
+        loop = asyncio.get_running_loop()
+        pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        pending = deque()
+
+        try:
+            async with engine.connect() as conn:
+                result = await conn.stream(query)
+                async for partition in result.partitions(self.batch_size):
+                    rows = [
+                        (row[0], row[1], row[2].name, *row[3:])
+                        for row in partition
+                    ]
+                    if pool is None:
+                        self._settle(rows, _verify_hashes(rows))
+                    else:
+                        pending.append((rows, loop.run_in_executor(pool, _verify_hashes, rows)))
+                        if len(pending) >= self.workers * 2:
+                            rows, future = pending.popleft()
+                            self._settle(rows, await future)
+
+                    if len(self.failures) >= MAX_REPORTED_FAILURES:
+                        break
+
+                while pending:
+                    rows, future = pending.popleft()
+                    self._settle(rows, await future)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+        duration = time.perf_counter() - started
+        checkpoint_id, segments_sealed = await self._save_checkpoint(duration)
+
+        return {
+            "status": "failed" if self.failures else "ok",
+            "start_id": self.start_id,
+            "verified_up_to_id": self.verified_up_to_id,
+            "rows_scanned": self.rows_scanned,
+            "rows_verified": self.rows_verified,
+            "failures": self.failures[:MAX_REPORTED_FAILURES],
+            "duration_seconds": round(duration, 3),
+            "rows_per_second": round(self.rows_scanned / duration) if duration > 0 else 0,
+            "checkpoint_id": checkpoint_id,
+            "merkle_segments_sealed": segments_sealed,
+        }
+
+    async def _save_checkpoint(self, duration: float) -> tuple:
+        from app.database import async_session_maker
+
+        checkpoint = None
+        async with async_session_maker() as db:
+            if self.verified_up_to_id > self.start_id:
+                checkpoint = AuditVerificationCheckpoint(
+                    verified_up_to_id=self.verified_up_to_id,
+                    chain_heads=json.dumps(self.verified_heads),
+                    rows_verified=self.rows_verified,
+                    duration_ms=int(duration * 1000),
+                )
+                db.add(checkpoint)
+            segments_sealed = await seal_merkle_segments(db, self.verified_up_to_id)
+            await db.commit()
+
+        return (checkpoint.id if checkpoint else None), segments_sealed
+
+
+async def verify_audit_chain(
+    batch_size: Optional[int] = None,
+    workers: Optional[int] = None,
+    full: bool = False,
+) -> dict:
+    """Verify audit_logs from the last checkpoint (or from genesis with `full`)"""
+    return await AuditChainVerifier(batch_size=batch_size, workers=workers, full=full).run()
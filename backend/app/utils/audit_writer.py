@@ -0,0 +1,193 @@
+"""
+Group-commit audit log writer
+
+Request handlers enqueue audit entries; background writer tasks link
+them into their hash chain in memory and insert each batch with one
+multi-row INSERT on their own connection. This removes the per-write
+"last hash" lookup and flush from the request path. Each batch locks its
+chains and reads their heads in its own transaction, so writers in other
+workers and inline appends (TRANSACTIONAL_ACTIONS) never fork a chain.
+
+With AUDIT_CHAIN_SHARDING enabled, entries are spread over independent
+shard chains. Each chain is owned by exactly one writer lane, so lanes
+commit in parallel without coordinating, and a periodic anchor entry on
+the root chain records the shard heads this worker has written.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional, List, Tuple, Dict
+
+from sqlalchemy import insert
+
+from app.config import settings
+from app.models.audit_log import ROOT_CHAIN_ID
+from app.utils.audit import get_last_log_hash, lock_chain, build_audit_entry, chain_audit_entry
+from app.metrics import audit_write_duration, audit_write_errors
+
+logger = logging.getLogger("suvidha")
+
+
+class AuditWriter:
+    """Batches audit entries and commits them in group"""
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        flush_interval_ms: Optional[int] = None,
+        max_queue_size: Optional[int] = None,
+        lanes: Optional[int] = None,
+        anchor_interval: Optional[int] = None,
+    ):
+        self.batch_size = batch_size or settings.AUDIT_BATCH_SIZE
+        self.flush_interval = (
+            flush_interval_ms if flush_interval_ms is not None else settings.AUDIT_FLUSH_INTERVAL_MS
+        ) / 1000
+        self.max_queue_size = max_queue_size or settings.AUDIT_QUEUE_MAX_SIZE
+        self.lanes = max(1, lanes or settings.AUDIT_WRITER_LANES)
+        self.anchor_interval = (
+            anchor_interval if anchor_interval is not None else settings.AUDIT_ANCHOR_INTERVAL_SECONDS
+        )
+        # Last head this worker wrote to each chain, for anchoring
+        self.heads: Dict[str, Optional[str]] = {}
+        self.queues: List[asyncio.Queue] = []
+        self._tasks: List[asyncio.Task] = []
+        self._anchor_task: Optional[asyncio.Task] = None
+        self._anchored_heads: Dict[str, Optional[str]] = {}
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    async def start(self) -> None:
+        """Start the background writer lanes (and the anchor task when sharded)"""
+        if self.running:
+            return
+        self.queues = [asyncio.Queue(maxsize=self.max_queue_size) for _ in range(self.lanes)]
+        self._tasks = [
+            asyncio.create_task(self._run(queue), name=f"audit-writer-{i}")
+            for i, queue in enumerate(self.queues)
+        ]
+        if settings.AUDIT_CHAIN_SHARDING != "none" and self.anchor_interval > 0:
+            self._anchor_task = asyncio.create_task(self._anchor_loop(), name="audit-anchor")
+
+    async def stop(self) -> None:
+        """Anchor the final shard heads, drain queued entries and stop"""
+        if not self.running:
+            return
+        if self._anchor_task is not None:
+            self._anchor_task.cancel()
+            self._anchor_task = None
+            await self.anchor()
+        for queue in self.queues:
+            await queue.put(None)
+        await asyncio.gather(*self._tasks)
+        self._tasks = []
+
+    async def submit(self, entry: dict, wait: bool = False) -> None:
+        """Queue an entry; with `wait`, return only after its batch commits"""
+        future = asyncio.get_running_loop().create_future() if wait else None
+        await self._queue_for(entry["chain_id"]).put((entry, future))
+        if future is not None:
+            await future
+
+    async def anchor(self) -> None:
+        """Record the current shard heads as an entry on the root chain"""
+        heads = {
+            chain_id: head for chain_id, head in self.heads.items()
+            if chain_id != ROOT_CHAIN_ID and head is not None
+        }
+        if not heads or heads == self._anchored_heads:
+            return
+        entry = build_audit_entry(
+            action="CHAIN_ANCHOR",
+            actor_type="system",
+            description=f"Anchored {len(heads)} shard chain heads",
+            metadata={"heads": heads},
+            chain_id=ROOT_CHAIN_ID,
+        )
+        await self.submit(entry, wait=True)
+        self._anchored_heads = heads
+
+    def _queue_for(self, chain_id: str) -> asyncio.Queue:
+        return self.queues[hash(chain_id) % len(self.queues)]
+
+    async def _anchor_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.anchor_interval)
+            try:
+                await self.anchor()
+            except Exception as exc:
+                logger.error(f"Audit chain anchor failed: {str(exc)}")
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        stopping = False
+        while not stopping:
+            item = await queue.get()
+            if item is None:
+                break
+            batch = [item]
+
+            # Linger briefly so concurrent requests share one commit
+            if self.flush_interval and queue.qsize() < self.batch_size - 1:
+                await asyncio.sleep(self.flush_interval)
+
+            while len(batch) < self.batch_size and not queue.empty():
+                item = queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._write_batch(batch)
+
+    async def _write_batch(self, batch: List[Tuple[dict, Optional[asyncio.Future]]]) -> None:
+        from app.database import async_session_maker
+        from app.models.audit_log import AuditLog
+
+        chain_ids = {entry["chain_id"] for entry, _ in batch}
+        heads = {}
+        start = time.perf_counter()
+
+        try:
+            async with async_session_maker() as db:
+                # Sorted, so lanes locking several chains cannot deadlock
+                for chain_id in sorted(chain_ids):
+                    await lock_chain(db, chain_id)
+                    heads[chain_id] = await get_last_log_hash(db, chain_id)
+
+                rows = []
+                for entry, _ in batch:
+                    row = chain_audit_entry(entry, heads[entry["chain_id"]])
+                    rows.append(row)
+                    heads[entry["chain_id"]] = row["log_hash"]
+
+                await db.execute(insert(AuditLog).values(rows))
+                await db.commit()
+        except Exception as exc:
+            audit_write_errors.inc()
+            logger.error(f"Audit batch of {len(batch)} entries failed: {str(exc)}", exc_info=True)
+            for _, future in batch:
+                if future is not None and not future.done():
+                    future.set_exception(exc)
+            return
+
+        audit_write_duration.observe(time.perf_counter() - start, "batch")
+        self.heads.update(heads)
+        for _, future in batch:
+            if future is not None and not future.done():
+                future.set_result(None)
+
+
+audit_writer = AuditWriter()
+
+
+async def start_audit_writer() -> None:
+    """Start the process-wide audit writer if enabled"""
+    if settings.AUDIT_WRITER_ENABLED:
+        await audit_writer.start()
+
+
+async def stop_audit_writer() -> None:
+    """Flush pending entries and stop the process-wide audit writer"""
+    await audit_writer.stop()
@@ -0,0 +1,40 @@
+"""
+CPU offload executor
+
+bcrypt verification and PBKDF2 key derivation take tens to hundreds of
+milliseconds of CPU each. Run on the event loop, a burst of them (admin
+logins at shift start) stalls every other request on the worker. They
+run here instead, in a small thread pool: both release the GIL, and the
+pool size caps how many cores a login burst can take from the worker.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.config import settings
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.CPU_EXECUTOR_WORKERS,
+            thread_name_prefix="cpu-offload",
+        )
+    return _executor
+
+
+async def run_cpu_bound(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a CPU-heavy function off the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_cpu_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -34,6 +34,11 @@ def _get_fernet():
     return _fernet
 
 
+def init_encryption() -> None:
+    """Derive the Fernet key now (called at startup, off the event loop)"""
+    _get_fernet()
+
+
 def encrypt_data(plaintext: str) -> str:
     """Encrypt sensitive data using AES (Fernet)"""
     if not plaintext:
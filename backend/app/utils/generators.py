@@ -6,6 +6,7 @@ import io
 import base64
 from datetime import datetime
 import qrcode
+import qrcode.image.svg
 
 
 def generate_tracking_id(prefix: str = "GRV") -> str:
@@ -41,8 +42,8 @@ def generate_session_id() -> str:
     return f"SES_{uuid.uuid4().hex}"
 
 
-def generate_qr_code(data: str, box_size: int = 10) -> str:
-    """Generate QR code as base64 PNG"""
+def render_qr_image(data: str, image_format: str = "png", box_size: int = 10) -> bytes:
+    """Render a QR code as PNG or SVG bytes (CPU-bound; run off the event loop)"""
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
@@ -52,14 +53,19 @@ def generate_qr_code(data: str, box_size: int = 10) -> str:
     qr.add_data(data)
     qr.make(fit=True)
     
-    img = qr.make_image(fill_color="black", back_color="white")
-    
-    # Convert to base64
     buffer = io.BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
-    img_base64 = base64.b64encode(buffer.read()).decode()
-    
+    if image_format == "svg":
+        img = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)
+        img.save(buffer)
+    else:
+        img = qr.make_image(fill_color="black", back_color="white")
+        img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def generate_qr_code(data: str, box_size: int = 10) -> str:
+    """Generate QR code as base64 PNG"""
+    img_base64 = base64.b64encode(render_qr_image(data, "png", box_size)).decode()
     return f"data:image/png;base64,{img_base64}"
 
 
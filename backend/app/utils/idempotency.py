@@ -0,0 +1,117 @@
+"""
+Idempotency key store
+
+Remembers the response of a request made with an Idempotency-Key header
+so that retries (e.g. offline queue replays after a timeout) get the
+original response back instead of repeating the side effect. Redis is
+used when reachable, with an in-process TTL store as fallback.
+"""
+import hashlib
+import json
+import time
+from typing import Optional, Dict, Tuple
+
+from app.config import settings
+from app.utils.redis_client import get_redis, redis_manager
+
+# Stored while the first request with a key is still being processed
+IN_PROGRESS = "__in_progress__"
+
+
+def fingerprint_request(body: str) -> str:
+    """Hash of the request body, to reject a key reused for a different request"""
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+class InMemoryIdempotencyStore:
+    """TTL key/value store for single-process deployments"""
+
+    # Purge expired keys every N writes
+    SWEEP_EVERY = 1000
+
+    def __init__(self):
+        self.entries: Dict[str, Tuple[float, str]] = {}
+        self._writes = 0
+
+    def _sweep(self) -> None:
+        now = time.monotonic()
+        self.entries = {k: v for k, v in self.entries.items() if v[0] > now}
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self.entries[key]
+            return None
+        return entry[1]
+
+    def set(self, key: str, value: str, ttl: int, only_if_absent: bool = False) -> bool:
+        if only_if_absent and self.get(key) is not None:
+            return False
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self._writes += 1
+        if self._writes % self.SWEEP_EVERY == 0:
+            self._sweep()
+        return True
+
+    def delete(self, key: str) -> None:
+        self.entries.pop(key, None)
+
+
+class IdempotencyStore:
+    """Reserve / complete / release lifecycle for idempotency keys"""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self.local = InMemoryIdempotencyStore()
+
+    def _key(self, key: str) -> str:
+        return f"idem:{key}"
+
+    async def reserve(self, key: str, fingerprint: str) -> Optional[dict]:
+        """
+        Claim a key for a new request. Returns None if claimed, otherwise
+        the stored record: {"fingerprint", "response"} where response is
+        IN_PROGRESS while the first request is still being processed.
+        """
+        record = json.dumps({"fingerprint": fingerprint, "response": IN_PROGRESS})
+        client = get_redis()
+        if client:
+            try:
+                if await client.set(self._key(key), record, ex=self.ttl, nx=True):
+                    return None
+                stored = await client.get(self._key(key))
+                return json.loads(stored) if stored else None
+            except Exception:
+                redis_manager.mark_failed()  # Fall back to the local store
+
+        if self.local.set(key, record, self.ttl, only_if_absent=True):
+            return None
+        stored = self.local.get(key)
+        return json.loads(stored) if stored else None
+
+    async def complete(self, key: str, fingerprint: str, response: str) -> None:
+        """Store the final response for a claimed key"""
+        record = json.dumps({"fingerprint": fingerprint, "response": response})
+        client = get_redis()
+        if client:
+            try:
+                await client.set(self._key(key), record, ex=self.ttl)
+                return
+            except Exception:
+                redis_manager.mark_failed()
+        self.local.set(key, record, self.ttl)
+
+    async def release(self, key: str) -> None:
+        """Drop a claim so the request can be retried (used on failure)"""
+        client = get_redis()
+        if client:
+            try:
+                await client.delete(self._key(key))
+            except Exception:
+                redis_manager.mark_failed()
+        self.local.delete(key)
+
+
+idempotency_store = IdempotencyStore(settings.IDEMPOTENCY_TTL_SECONDS)
@@ -0,0 +1,82 @@
+"""
+Logging pipeline
+
+All "suvidha" loggers write to a QueueHandler; a QueueListener thread
+formats records as JSON lines and does the stream I/O, so a log call on
+the event loop only enqueues a record. Access log records
+("suvidha.access") carry the request fields as structured attributes.
+"""
+import json
+import logging
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, List, Tuple
+
+from app.config import settings
+
+# Attributes every LogRecord has; anything else was passed via `extra`
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[QueueListener] = None
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, including `extra` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def parse_route_settings(spec: str, cast) -> List[Tuple[str, object]]:
+    """Parse "path=value,path=value" into (path prefix, value), longest prefix first"""
+    routes = []
+    for item in spec.split(","):
+        if "=" in item:
+            path, value = item.split("=", 1)
+            routes.append((path.strip(), cast(value.strip())))
+    return sorted(routes, key=lambda entry: len(entry[0]), reverse=True)
+
+
+def setup_logging() -> None:
+    """Route the app's loggers through a queue drained by a background thread"""
+    global _listener
+    if _listener is not None:
+        return
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JSONFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(
+        "%(asctime)s %(levelname)s %(name)s %(message)s"
+    ))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+
+    app_logger = logging.getLogger("suvidha")
+    app_logger.handlers = [QueueHandler(log_queue)]
+    app_logger.setLevel(settings.LOG_LEVEL or (logging.INFO if settings.DEBUG else logging.WARNING))
+    app_logger.propagate = False
+
+    # Access records carry their own level (per route / status); this is the threshold
+    logging.getLogger("suvidha.access").setLevel(settings.ACCESS_LOG_LEVEL)
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,95 @@
+"""
+In-process OTP store
+
+Holds OTPs issued while Redis is unavailable (and on single-kiosk edge
+deployments without Redis). Entries expire after OTP_EXPIRE_MINUTES, are
+dropped after OTP_MAX_ATTEMPTS wrong guesses, and the store never holds
+more than OTP_LOCAL_MAX_ENTRIES: the least recently issued OTP is evicted
+first. A background sweeper removes expired entries, so abandoned login
+attempts do not accumulate over weeks of uptime.
+"""
+import asyncio
+import hmac
+import time
+from collections import OrderedDict
+from typing import Optional, List
+
+from app.config import settings
+
+
+class LocalOTPStore:
+    """TTL + LRU bounded OTP store with per-OTP attempt counters"""
+
+    def __init__(self, max_size: int, max_attempts: int, sweep_interval: int):
+        self.max_size = max_size
+        self.max_attempts = max_attempts
+        self.sweep_interval = sweep_interval
+        # key -> [otp, expires_at (monotonic), failed attempts]
+        self._entries: "OrderedDict[str, List]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def set(self, key: str, otp: str, ttl: int) -> None:
+        """Store a new OTP for key, replacing any previous one"""
+        self._entries[key] = [otp, time.monotonic() + ttl, 0]
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def verify(self, key: str, otp: str) -> Optional[bool]:
+        """
+        Check an OTP. Returns None if no OTP is stored for key, otherwise
+        whether it matched. A match, expiry or too many wrong guesses
+        removes the entry.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del self._entries[key]
+            return False
+        if hmac.compare_digest(entry[0].encode(), otp.encode()):
+            del self._entries[key]
+            return True
+        entry[2] += 1
+        if entry[2] >= self.max_attempts:
+            del self._entries[key]
+        return False
+
+    def sweep(self) -> int:
+        """Remove expired entries; returns how many were removed"""
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if entry[1] <= now]
+        for key in expired:
+            del self._entries[key]
+        return len(expired)
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            self.sweep()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+local_otp_store = LocalOTPStore(
+    max_size=settings.OTP_LOCAL_MAX_ENTRIES,
+    max_attempts=settings.OTP_MAX_ATTEMPTS,
+    sweep_interval=settings.OTP_SWEEP_INTERVAL_SECONDS,
+)
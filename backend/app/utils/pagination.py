@@ -0,0 +1,71 @@
+"""
+Keyset (cursor) pagination helpers
+
+A cursor is an opaque token holding the sort key of the last row on the
+previous page. The next page starts strictly after that key, so it is
+found with an index seek and costs the same at any depth, unlike OFFSET.
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Optional, List, Any, Type
+
+from fastapi import HTTPException, status
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+# Bounds of the INTEGER columns cursors are built from
+_INT_MIN, _INT_MAX = -2 ** 31, 2 ** 31 - 1
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            value = datetime.fromisoformat(value["dt"])
+            # Timestamp columns are naive UTC
+            if value.tzinfo is not None:
+                raise ValueError("aware datetime in cursor")
+            return value
+        return date.fromisoformat(value["d"])
+    if type(value) is int and not _INT_MIN <= value <= _INT_MAX:
+        raise ValueError("integer out of range")
+    return value
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode sort key values (datetimes, dates, ints, strings) as an opaque cursor"""
+    payload = [_encode_value(v) for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], *types: Type) -> Optional[List[Any]]:
+    """
+    Decode a cursor produced by encode_cursor for a sort key of the given
+    column types, e.g. decode_cursor(cursor, datetime, int); raises 400 if
+    it is malformed or does not match the sort key
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError("wrong cursor size")
+        values = [_decode_value(v) for v in payload]
+        # Exact types: bool is an int and datetime a date, but neither fits the other's column
+        if any(type(value) is not expected for value, expected in zip(values, types)):
+            raise ValueError("wrong cursor value type")
+        return values
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
@@ -0,0 +1,162 @@
+"""
+Per-user payment hash chain
+
+Each user's payments form a hash chain whose head is stored on
+users.payment_chain_head. Appending is a compare-and-swap UPDATE of that
+column against the head cached in this process: on the happy path one
+statement both checks the head and takes the user's row lock until
+commit, so concurrent payments by the same user (from any worker) are
+serialized and can never fork the chain. A stale cache entry makes the
+CAS miss, in which case the head is re-read under lock and the append
+is retried once. A batch of payments is linked in memory and moves the
+head with a single swap.
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional, Tuple, List
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.user import User
+from app.models.payment import Payment
+
+_MISSING = object()
+
+
+class PaymentChainHeadCache:
+    """LRU cache of user_id -> last payment transaction hash"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._heads: "OrderedDict[int, Optional[str]]" = OrderedDict()
+
+    def get(self, user_id: int):
+        head = self._heads.get(user_id, _MISSING)
+        if head is not _MISSING:
+            self._heads.move_to_end(user_id)
+        return head
+
+    def set(self, user_id: int, head: Optional[str]) -> None:
+        self._heads[user_id] = head
+        self._heads.move_to_end(user_id)
+        while len(self._heads) > self.max_size:
+            self._heads.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        self._heads.pop(user_id, None)
+
+
+payment_chain_heads = PaymentChainHeadCache(settings.PAYMENT_CHAIN_CACHE_SIZE)
+
+
+def compute_transaction_hash(
+    transaction_id: str,
+    bill_id: Optional[int],
+    amount: Decimal,
+    timestamp: datetime,
+    previous_hash: Optional[str]
+) -> str:
+    """Compute SHA-256 hash for a payment (per-user immutable chain)"""
+    hash_data = json.dumps({
+        "transaction_id": transaction_id,
+        "bill_id": bill_id,
+        "amount": str(amount),
+        "timestamp": timestamp.isoformat(),
+        "previous_hash": previous_hash or "GENESIS"
+    }, sort_keys=True)
+    return hashlib.sha256(hash_data.encode()).hexdigest()
+
+
+async def _load_head_for_update(db: AsyncSession, user_id: int) -> Optional[str]:
+    """Read the chain head with the user's row locked"""
+    result = await db.execute(
+        select(User.payment_chain_head).where(User.id == user_id).with_for_update()
+    )
+    head = result.scalar_one_or_none()
+    if head is not None:
+        return head
+
+    # Users whose payments predate payment_chain_head
+    result = await db.execute(
+        select(Payment.transaction_hash)
+        .where(Payment.user_id == user_id)
+        .order_by(Payment.id.desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def _swap_head(db: AsyncSession, user_id: int, expected: Optional[str], new_head: str) -> bool:
+    result = await db.execute(
+        update(User)
+        .where(User.id == user_id, User.payment_chain_head.is_not_distinct_from(expected))
+        .values(payment_chain_head=new_head, updated_at=User.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def _link(payments: List[dict], head: Optional[str]) -> List[Tuple[str, Optional[str]]]:
+    links = []
+    for p in payments:
+        transaction_hash = compute_transaction_hash(
+            p["transaction_id"], p["bill_id"], p["amount"], p["timestamp"], head
+        )
+        links.append((transaction_hash, head))
+        head = transaction_hash
+    return links
+
+
+async def append_many_to_payment_chain(
+    db: AsyncSession,
+    user_id: int,
+    payments: List[dict]
+) -> List[Tuple[str, Optional[str]]]:
+    """
+    Link payments (dicts of transaction_id, bill_id, amount, timestamp)
+    into the user's chain in order, moving the head once.
+    Returns (transaction_hash, previous_hash) per payment. The user's row
+    stays locked until the caller's transaction ends.
+    """
+    head = payment_chain_heads.get(user_id)
+
+    if head is not _MISSING:
+        links = _link(payments, head)
+        if await _swap_head(db, user_id, head, links[-1][0]):
+            payment_chain_heads.set(user_id, links[-1][0])
+            return links
+
+    # Cache miss or stale head: re-read under lock, so this swap cannot lose
+    head = await _load_head_for_update(db, user_id)
+    links = _link(payments, head)
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(payment_chain_head=links[-1][0], updated_at=User.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    payment_chain_heads.set(user_id, links[-1][0])
+    return links
+
+
+async def append_to_payment_chain(
+    db: AsyncSession,
+    user_id: int,
+    transaction_id: str,
+    bill_id: Optional[int],
+    amount: Decimal,
+    timestamp: datetime
+) -> Tuple[str, Optional[str]]:
+    """Link a single payment into the user's chain; returns (transaction_hash, previous_hash)"""
+    links = await append_many_to_payment_chain(db, user_id, [{
+        "transaction_id": transaction_id,
+        "bill_id": bill_id,
+        "amount": amount,
+        "timestamp": timestamp,
+    }])
+    return links[0]
@@ -0,0 +1,119 @@
+"""
+Authenticated principal cache
+
+get_current_user / get_current_admin look up the token subject on every
+request. This cache keeps a snapshot of the active User/Admin row per
+subject in an in-process TTL + LRU map. A hit is re-attached to the
+request's session without a SELECT, so routes can still modify and
+flush it. Snapshots include password hashes and encrypted PII, so they
+are never written to a shared store such as Redis.
+
+Any ORM update of a User or Admin (profile edits, login bookkeeping,
+deactivation) invalidates its entry once the transaction commits. Other
+workers' in-process entries age out after PRINCIPAL_CACHE_TTL_SECONDS,
+which bounds how long a deactivated principal stays usable there.
+"""
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Tuple, Type
+
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from app.config import settings
+from app.models.user import User
+from app.models.admin import Admin
+
+PRINCIPAL_TYPES: Dict[str, Type] = {
+    "user": User,
+    "admin": Admin,
+}
+
+_PENDING_KEY = "principal_cache_invalidations"
+
+
+def snapshot(instance) -> dict:
+    """Column values of a loaded User/Admin"""
+    return {attr.key: getattr(instance, attr.key) for attr in inspect(type(instance)).column_attrs}
+
+
+class PrincipalCache:
+    """TTL + LRU cache of principal snapshots keyed by (type, id)"""
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[float, dict]]" = OrderedDict()
+
+    def _get_values(self, principal_type: str, principal_id: int) -> Optional[dict]:
+        key = (principal_type, principal_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _store_local(self, key: Tuple[str, int], values: dict) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, values)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get(self, db: AsyncSession, principal_type: str, principal_id: int):
+        """Cached principal attached to `db`, or None on a miss"""
+        values = self._get_values(principal_type, principal_id)
+        if values is None:
+            return None
+
+        instance = PRINCIPAL_TYPES[principal_type](**values)
+        make_transient_to_detached(instance)
+        return await db.merge(instance, load=False)
+
+    async def set(self, principal_type: str, instance) -> None:
+        """Cache a freshly loaded, active principal"""
+        self._store_local((principal_type, instance.id), snapshot(instance))
+
+    def invalidate(self, principal_type: str, principal_id: int) -> None:
+        """Drop a principal; safe to call from synchronous code (ORM events)"""
+        self._entries.pop((principal_type, principal_id), None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+# Invalidate on update: record changed principals during flush and drop
+# their entries after commit, so a concurrent request cannot re-cache the
+# pre-update row between the two.
+
+def _record_update(principal_type: str):
+    def listener(mapper, connection, target):
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault(_PENDING_KEY, set()).add((principal_type, target.id))
+    return listener
+
+
+for _principal_type, _model in PRINCIPAL_TYPES.items():
+    event.listen(_model, "after_update", _record_update(_principal_type))
+    event.listen(_model, "after_delete", _record_update(_principal_type))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    for principal_type, principal_id in session.info.pop(_PENDING_KEY, ()):
+        principal_cache.invalidate(principal_type, principal_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,186 @@
+"""
+Sampling profiler for live workers
+
+A daemon thread snapshots thread stacks (sys._current_frames) at a fixed
+interval; the profiled threads are never traced or paused beyond the GIL
+hand-off, so overhead stays low enough to run in production. Profiles
+are returned as collapsed stacks ("frame;frame;frame count" lines), the
+input format of flamegraph.pl, speedscope and inferno.
+
+RouteProfiler keeps per-route wall time and sampled event-loop time while
+enabled. MetricsMiddleware registers each in-flight request's coroutine
+frame; a sample of the event loop thread is charged to the route whose
+frame is on its stack. Enabling, disabling and resetting take effect
+immediately, without a restart.
+
+Both cover only the worker process that serves the admin request.
+"""
+import asyncio
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from types import FrameType
+from typing import Dict, List, Optional
+
+from starlette.types import Scope
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    # ';' separates frames in the collapsed format
+    return f"{frame.f_globals.get('__name__', '?')}:{code.co_qualname}".replace(";", ",")
+
+
+def collapse_stack(frame: Optional[FrameType]) -> List[str]:
+    """Frame labels from the outermost call to the innermost"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+class SamplingProfiler:
+    """On-demand stack sampler; one profile runs at a time per worker"""
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    async def profile(self, seconds: float, interval: float, all_threads: bool = False) -> str:
+        """
+        Sample for `seconds` and return collapsed stacks.
+        Samples the event loop thread only, unless `all_threads` is set
+        (thread pools, the log listener, ...), in which case each stack is
+        rooted at its thread name.
+        """
+        if self._lock.locked():
+            raise RuntimeError("A profile is already running in this worker")
+
+        async with self._lock:
+            loop_thread = threading.get_ident()
+            stacks: Counter = Counter()
+            stop = threading.Event()
+
+            def sample() -> None:
+                own = threading.get_ident()
+                while not stop.wait(interval):
+                    names = {thread.ident: thread.name for thread in threading.enumerate()} if all_threads else {}
+                    for thread_id, frame in sys._current_frames().items():
+                        if thread_id == own or (not all_threads and thread_id != loop_thread):
+                            continue
+                        labels = collapse_stack(frame)
+                        if all_threads:
+                            labels.insert(0, names.get(thread_id, str(thread_id)))
+                        stacks[";".join(labels)] += 1
+
+            sampler = threading.Thread(target=sample, name="suvidha-profiler", daemon=True)
+            sampler.start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                stop.set()
+                await asyncio.to_thread(sampler.join)
+
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class RouteProfiler:
+    """Per-route wall time and sampled event loop time, toggled at runtime"""
+
+    def __init__(self):
+        self.enabled = False
+        self.interval = 0.01
+        self.started_at: Optional[datetime] = None
+        # id(coroutine frame) -> request scope, for requests in flight
+        self._active: Dict[int, Scope] = {}
+        # route -> [requests, wall seconds, max wall seconds, sampled loop seconds]
+        self._routes: Dict[str, list] = {}
+        self._loop_thread: Optional[int] = None
+        self._stop: Optional[threading.Event] = None
+        self._sampler: Optional[threading.Thread] = None
+
+    def enable(self, interval: float) -> None:
+        """Start accounting; call from the event loop thread"""
+        self.interval = interval
+        if self.enabled:
+            return
+        self._loop_thread = threading.get_ident()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name="suvidha-route-profiler", daemon=True)
+        self._sampler.start()
+        self.started_at = datetime.utcnow()
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Stop accounting; collected totals are kept until reset"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        self._stop.set()
+        self._sampler = None
+        self._active.clear()
+
+    def reset(self) -> None:
+        self._routes = {}
+        self.started_at = datetime.utcnow() if self.enabled else None
+
+    @staticmethod
+    def _route(scope: Scope) -> str:
+        route = scope.get("route")
+        return getattr(route, "path", None) or "unmatched"
+
+    def begin(self, frame: FrameType, scope: Scope) -> None:
+        self._active[id(frame)] = scope
+
+    def end(self, frame: FrameType, scope: Scope, wall: float) -> None:
+        self._active.pop(id(frame), None)
+        totals = self._routes.setdefault(self._route(scope), [0, 0.0, 0.0, 0.0])
+        totals[0] += 1
+        totals[1] += wall
+        totals[2] = max(totals[2], wall)
+
+    def _sample(self) -> None:
+        stop = self._stop
+        while True:
+            interval = self.interval
+            if stop.wait(interval):
+                return
+            frame = sys._current_frames().get(self._loop_thread)
+            while frame is not None:
+                scope = self._active.get(id(frame))
+                if scope is not None:
+                    totals = self._routes.setdefault(self._route(scope), [0, 0.0, 0.0, 0.0])
+                    totals[3] += interval
+                    break
+                frame = frame.f_back
+
+    def snapshot(self) -> dict:
+        routes = []
+        # list() copies in one step; the sampler thread may be adding routes
+        for route, (requests, wall, max_wall, loop) in list(self._routes.items()):
+            routes.append({
+                "route": route,
+                "requests": requests,
+                "wall_ms_total": round(wall * 1000, 2),
+                "wall_ms_avg": round(wall * 1000 / requests, 2) if requests else None,
+                "wall_ms_max": round(max_wall * 1000, 2),
+                # Time the event loop thread was running this route's code (sampled)
+                "loop_ms_total": round(loop * 1000, 2),
+            })
+        routes.sort(key=lambda entry: entry["loop_ms_total"], reverse=True)
+        return {
+            "enabled": self.enabled,
+            "interval_ms": round(self.interval * 1000, 3),
+            "since": self.started_at.isoformat() if self.started_at else None,
+            "routes": routes,
+        }
+
+
+sampling_profiler = SamplingProfiler()
+route_profiler = RouteProfiler()
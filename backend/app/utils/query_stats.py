@@ -0,0 +1,127 @@
+"""
+Per-request SQL query statistics
+
+Engine event hooks count the statements each request runs and the time
+spent in them. RequestLoggingMiddleware starts a RequestQueryStats for
+every request (held in a context variable, which SQLAlchemy's greenlets
+inherit) and reports the totals in the Server-Timing header and the
+access log. Statements slower than SLOW_QUERY_MS are logged with their
+parameters redacted to their types. With DEBUG and N_PLUS_ONE_DETECTION
+on, a statement repeated N_PLUS_ONE_THRESHOLD times within one request
+logs a warning.
+"""
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar, Token
+from typing import Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import settings
+
+logger = logging.getLogger("suvidha")
+
+# Longest statement text included in a log record
+_MAX_STATEMENT_LENGTH = 1000
+
+
+class RequestQueryStats:
+    """Query count and database time for one request"""
+
+    __slots__ = ("path", "count", "duration", "shapes")
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self.duration = 0.0
+        # Executions per statement text, only while detecting N+1 queries
+        self.shapes: Optional[Counter] = Counter() if _detect_n_plus_one() else None
+
+    @property
+    def duration_ms(self) -> float:
+        return round(self.duration * 1000, 2)
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration_ms};desc="{self.count} queries"'
+
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def _detect_n_plus_one() -> bool:
+    return settings.DEBUG and settings.N_PLUS_ONE_DETECTION
+
+
+def start_request_stats(path: str) -> Tuple[RequestQueryStats, Token]:
+    """Begin collecting stats for the current request; pass the token to finish_request_stats"""
+    stats = RequestQueryStats(path)
+    return stats, _current.set(stats)
+
+
+def current_request_stats() -> Optional[RequestQueryStats]:
+    return _current.get()
+
+
+def finish_request_stats(token: Token) -> None:
+    _current.reset(token)
+
+
+def redact_parameters(parameters, executemany: bool = False):
+    """Replace bound values with their type names"""
+    if executemany:
+        return f"<{len(parameters)} rows>"
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._suvidha_query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_suvidha_query_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+        if stats.shapes is not None:
+            stats.shapes[statement] += 1
+            # Warn once per statement, when it reaches the threshold
+            if stats.shapes[statement] == settings.N_PLUS_ONE_THRESHOLD:
+                logger.warning(
+                    "Possible N+1 query",
+                    extra={
+                        "path": stats.path,
+                        "repeats": settings.N_PLUS_ONE_THRESHOLD,
+                        "statement": statement[:_MAX_STATEMENT_LENGTH],
+                    },
+                )
+
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query",
+            extra={
+                "path": stats.path if stats is not None else None,
+                "duration_ms": round(elapsed * 1000, 2),
+                "statement": statement[:_MAX_STATEMENT_LENGTH],
+                "parameters": redact_parameters(parameters, executemany),
+            },
+        )
+
+
+def install_query_stats(engine: AsyncEngine) -> None:
+    """Attach the counting hooks to an engine"""
+    sync_engine = engine.sync_engine
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,97 @@
+"""
+Receipt QR rendering service
+
+QR images are rendered lazily, on first request, in a worker pool so the
+event loop never runs qrcode/PIL. Rendered images are kept in an LRU
+cache keyed by receipt number and format, together with the owning user,
+so repeat requests are served without rendering or a database lookup.
+Concurrent requests for the same uncached image share one render.
+"""
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Optional, Dict, Tuple
+
+from app.config import settings
+from app.utils.generators import render_qr_image
+
+MEDIA_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+
+def receipt_qr_data(receipt_number: str, transaction_id: str, amount) -> str:
+    """Payload encoded in a receipt QR code"""
+    return f"SUVIDHA|{receipt_number}|{transaction_id}|{amount}"
+
+
+def receipt_qr_url(receipt_number: str) -> str:
+    """API path of a receipt's QR image"""
+    return f"/api/v1/bills/receipts/{receipt_number}/qr"
+
+
+class ReceiptRenderer:
+    """Renders receipt QR codes in a pool and caches the results"""
+
+    def __init__(self, cache_size: int, workers: int, executor: str = "thread"):
+        self.cache_size = cache_size
+        self.workers = workers
+        self.executor_type = executor
+        # (receipt_number, format) -> (user_id, image bytes)
+        self._cache: "OrderedDict[Tuple[str, str], Tuple[int, bytes]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="receipt-qr")
+        return self._executor
+
+    def get_cached(self, receipt_number: str, image_format: str) -> Optional[Tuple[int, bytes]]:
+        """Cached (user_id, image) for a receipt, if rendered before"""
+        key = (receipt_number, image_format)
+        entry = self._cache.get(key)
+        if entry is not None:
+            self._cache.move_to_end(key)
+        return entry
+
+    async def render(self, receipt_number: str, image_format: str, user_id: int, data: str) -> bytes:
+        """Render (or join an in-progress render of) a receipt QR image"""
+        key = (receipt_number, image_format)
+        cached = self.get_cached(receipt_number, image_format)
+        if cached is not None:
+            return cached[1]
+
+        future = self._inflight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._get_executor(), render_qr_image, data, image_format)
+            self._inflight[key] = future
+            try:
+                image = await future
+            finally:
+                self._inflight.pop(key, None)
+
+            self._cache[key] = (user_id, image)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return image
+
+        return await future
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+receipt_renderer = ReceiptRenderer(
+    cache_size=settings.RECEIPT_QR_CACHE_SIZE,
+    workers=settings.RECEIPT_QR_WORKERS,
+    executor=settings.RECEIPT_QR_EXECUTOR,
+)
@@ -0,0 +1,143 @@
+"""
+Shared async Redis connection pool
+
+One redis.asyncio client (and its connection pool) per worker, created in
+the application lifespan. A background task pings Redis; while it is
+unreachable get_redis() returns None and callers use their in-process
+fallback instead of waiting on a dead connection, so a Redis outage or
+slowdown never blocks the event loop.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional, Set
+
+import redis.asyncio as aioredis
+
+from app.config import settings
+from app.metrics import redis_command_duration, redis_errors
+
+logger = logging.getLogger("suvidha")
+
+
+class InstrumentedRedis(aioredis.Redis):
+    """Redis client that records per-command latency and failures"""
+
+    async def execute_command(self, *args, **options):
+        command = str(args[0]).upper() if args else "UNKNOWN"
+        start = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        except Exception:
+            redis_errors.inc(command)
+            raise
+        finally:
+            redis_command_duration.observe(time.perf_counter() - start, command)
+
+
+class RedisManager:
+    """Owns the async Redis client and tracks whether Redis is reachable"""
+
+    def __init__(self, url: str, max_connections: int, socket_timeout: float, health_check_interval: int):
+        self.url = url
+        self.max_connections = max_connections
+        self.socket_timeout = socket_timeout
+        self.health_check_interval = health_check_interval
+        self.client: Optional[aioredis.Redis] = None
+        self.available = False
+        self.last_latency_ms: Optional[float] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self._background: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        self.client = InstrumentedRedis.from_url(
+            self.url,
+            decode_responses=True,
+            max_connections=self.max_connections,
+            socket_timeout=self.socket_timeout,
+            socket_connect_timeout=self.socket_timeout,
+            health_check_interval=self.health_check_interval,
+        )
+        await self.ping()
+        if not self.available:
+            logger.warning("Redis unavailable, using in-process fallbacks")
+        self._health_task = asyncio.create_task(self._health_loop())
+
+    async def stop(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+        self.available = False
+
+    async def ping(self) -> bool:
+        """Check Redis and update availability"""
+        if self.client is None:
+            self.available = False
+            return False
+        start = time.perf_counter()
+        try:
+            await self.client.ping()
+        except Exception:
+            if self.available:
+                logger.warning("Redis became unreachable, using in-process fallbacks")
+            self.available = False
+            self.last_latency_ms = None
+            return False
+        if not self.available:
+            logger.info("Redis connection available")
+        self.available = True
+        self.last_latency_ms = (time.perf_counter() - start) * 1000
+        return True
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            await self.ping()
+
+    def get(self) -> Optional[aioredis.Redis]:
+        """The client if Redis is reachable, else None"""
+        return self.client if self.available else None
+
+    def mark_failed(self) -> None:
+        """Called by users of the client on a connection error; the health check restores it"""
+        if self.available:
+            logger.warning("Redis call failed, using in-process fallbacks until the next health check")
+        self.available = False
+
+    def run_in_background(self, coro) -> None:
+        """Schedule a Redis call from synchronous code without awaiting it"""
+        try:
+            task = asyncio.get_running_loop().create_task(coro)
+        except RuntimeError:
+            coro.close()
+            return
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def health(self) -> dict:
+        return {
+            "available": self.available,
+            "latency_ms": round(self.last_latency_ms, 2) if self.last_latency_ms is not None else None,
+        }
+
+
+redis_manager = RedisManager(
+    url=settings.REDIS_URL,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+    health_check_interval=settings.REDIS_HEALTH_CHECK_SECONDS,
+)
+
+
+def get_redis() -> Optional[aioredis.Redis]:
+    """Shared async Redis client, or None while Redis is unavailable"""
+    return redis_manager.get()
@@ -5,28 +5,19 @@ from datetime import datetime, timedelta
 from typing import Optional, Any
 import secrets
 import hashlib
+import hmac
 from jose import jwt, JWTError
 from passlib.context import CryptContext
-import redis
 
 from app.config import settings
+from app.utils.cpu_executor import run_cpu_bound
+from app.utils.redis_client import get_redis, redis_manager
+from app.utils.otp_store import local_otp_store
+from app.utils.token_revocation import token_revocation
 
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-# Redis client for OTP storage
-redis_client = None
-
-def get_redis_client():
-    global redis_client
-    if redis_client is None:
-        try:
-            redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
-        except Exception:
-            # Fallback to in-memory storage for development
-            redis_client = {}
-    return redis_client
-
 
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt"""
@@ -38,6 +29,16 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def hash_password_async(password: str) -> str:
+    """hash_password in the CPU offload pool, for use in request handlers"""
+    return await run_cpu_bound(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password in the CPU offload pool, for use in request handlers"""
+    return await run_cpu_bound(verify_password, plain_password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -45,7 +46,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({
         "exp": expire,
         "type": "access",
-        "iat": datetime.utcnow()
+        "iat": datetime.utcnow(),
+        "jti": secrets.token_hex(16)
     })
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
@@ -57,35 +59,47 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None)
     to_encode.update({
         "exp": expire,
         "type": "refresh",
-        "iat": datetime.utcnow()
+        "iat": datetime.utcnow(),
+        "jti": secrets.token_hex(16)
     })
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 
-def verify_token(token: str, token_type: str = "access") -> Optional[dict]:
-    """Verify and decode JWT token"""
+async def verify_token(token: str, token_type: str = "access") -> Optional[dict]:
+    """Verify and decode JWT token, rejecting revoked tokens"""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         if payload.get("type") != token_type:
             return None
+        if await token_revocation.is_revoked(payload.get("jti")):
+            return None
         return payload
     except JWTError:
         return None
 
 
-def generate_otp(mobile: str) -> str:
+async def generate_otp(mobile: str) -> str:
     """Generate and store OTP for mobile number"""
     otp = ''.join([str(secrets.randbelow(10)) for _ in range(settings.OTP_LENGTH)])
     
-    client = get_redis_client()
     otp_key = f"otp:{hashlib.sha256(mobile.encode()).hexdigest()}"
+    ttl = settings.OTP_EXPIRE_MINUTES * 60
     
-    if isinstance(client, dict):
+    client = get_redis()
+    stored = False
+    if client:
+        try:
+            pipe = client.pipeline()
+            pipe.setex(otp_key, ttl, otp)
+            pipe.delete(f"{otp_key}:attempts")
+            await pipe.execute()
+            stored = True
+            local_otp_store.discard(otp_key)
+        except Exception:
+            redis_manager.mark_failed()
+    if not stored:
         # In-memory fallback
-        client[otp_key] = {"otp": otp, "expires": datetime.utcnow() + timedelta(minutes=settings.OTP_EXPIRE_MINUTES)}
-    else:
-        # Redis
-        client.setex(otp_key, settings.OTP_EXPIRE_MINUTES * 60, otp)
+        local_otp_store.set(otp_key, otp, ttl)
     
     # In production, send OTP via SMS gateway
     print(f"[DEV] OTP for {mobile}: {otp}")  # Remove in production
@@ -93,22 +107,47 @@ def generate_otp(mobile: str) -> str:
     return otp
 
 
-def verify_otp(mobile: str, otp: str) -> bool:
-    """Verify OTP for mobile number"""
-    client = get_redis_client()
+async def verify_otp(mobile: str, otp: str) -> bool:
+    """Verify OTP for mobile number; an OTP is dropped after OTP_MAX_ATTEMPTS wrong guesses"""
     otp_key = f"otp:{hashlib.sha256(mobile.encode()).hexdigest()}"
     
-    if isinstance(client, dict):
-        # In-memory fallback
-        stored = client.get(otp_key)
-        if stored and stored["otp"] == otp and stored["expires"] > datetime.utcnow():
-            del client[otp_key]
-            return True
+    # In-memory fallback (OTPs issued while Redis was unavailable)
+    verified = local_otp_store.verify(otp_key, otp)
+    if verified is not None:
+        return verified
+    
+    client = get_redis()
+    if not client:
         return False
-    else:
-        # Redis
-        stored_otp = client.get(otp_key)
-        if stored_otp and stored_otp == otp:
-            client.delete(otp_key)
-            return True
+    try:
+        stored_otp = await client.get(otp_key)
+    except Exception:
+        redis_manager.mark_failed()
+        return False
+    if not stored_otp:
         return False
+    
+    # Compared as bytes: compare_digest rejects non-ASCII str, and a bad
+    # guess must not be mistaken for a Redis failure
+    matched = hmac.compare_digest(stored_otp.encode(), otp.encode())
+    try:
+        if matched:
+            # DEL returns 0 if a concurrent request already redeemed it
+            return await client.delete(otp_key) == 1
+        
+        attempts_key = f"{otp_key}:attempts"
+        pipe = client.pipeline()
+        pipe.incr(attempts_key)
+        pipe.expire(attempts_key, settings.OTP_EXPIRE_MINUTES * 60)
+        attempts, _ = await pipe.execute()
+        if attempts >= settings.OTP_MAX_ATTEMPTS:
+            await client.delete(otp_key, attempts_key)
+    except Exception:
+        redis_manager.mark_failed()
+    return False
+
+
+async def revoke_token(payload: dict) -> None:
+    """Revoke a decoded token until it expires"""
+    if payload.get("jti") and payload.get("exp"):
+        await token_revocation.revoke(payload["jti"], int(payload["exp"]))
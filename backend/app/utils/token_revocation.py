@@ -0,0 +1,152 @@
+"""
+JWT revocation list
+
+Revoked token ids (jti) are stored in Redis: an exact key per jti that
+expires with the token, plus a sorted set of jti -> exp from which each
+worker periodically rebuilds an in-process Bloom filter. verify_token
+consults the filter first; only the rare positive (a revoked token or a
+false positive) costs an exact lookup, so unrevoked tokens are checked
+without a network round trip.
+
+Revocations made in this worker take effect immediately. Other workers
+see them after their next sync (TOKEN_REVOCATION_SYNC_SECONDS).
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from typing import Optional, Dict
+
+from app.config import settings
+from app.utils.redis_client import get_redis, redis_manager
+
+logger = logging.getLogger("suvidha")
+
+REVOKED_SET_KEY = "revoked_jtis"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class TokenRevocationStore:
+    """Revoke token ids and check them with a Bloom-filter fast path"""
+
+    def __init__(self, capacity: int, error_rate: float, sync_interval: int):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.bloom = BloomFilter(capacity, error_rate)
+        # Revocations made by this worker (jti -> exp), authoritative if Redis is down
+        self.local: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _key(self, jti: str) -> str:
+        return f"revoked:{jti}"
+
+    async def revoke(self, jti: str, expires_at: int) -> None:
+        """Revoke a token id until its expiry (epoch seconds)"""
+        now = int(time.time())
+        if expires_at <= now:
+            return
+        self.local[jti] = expires_at
+        self.bloom.add(jti)
+        client = get_redis()
+        if client:
+            try:
+                pipe = client.pipeline()
+                pipe.set(self._key(jti), 1, ex=expires_at - now)
+                pipe.zadd(REVOKED_SET_KEY, {jti: expires_at})
+                await pipe.execute()
+            except Exception as e:
+                redis_manager.mark_failed()
+                logger.warning(f"Could not store token revocation in Redis: {e}")
+
+    async def is_revoked(self, jti: Optional[str]) -> bool:
+        if not jti or jti not in self.bloom:
+            return False
+
+        expires_at = self.local.get(jti)
+        if expires_at is not None:
+            return expires_at > time.time()
+
+        client = get_redis()
+        if client:
+            try:
+                return bool(await client.exists(self._key(jti)))
+            except Exception:
+                redis_manager.mark_failed()
+        # Filter hit we cannot confirm: fail closed
+        return True
+
+    async def sync(self) -> int:
+        """Rebuild the Bloom filter from unexpired revocations; returns their count"""
+        now = int(time.time())
+        self.local = {jti: exp for jti, exp in self.local.items() if exp > now}
+
+        remote = []
+        client = get_redis()
+        if client:
+            try:
+                pipe = client.pipeline()
+                pipe.zremrangebyscore(REVOKED_SET_KEY, "-inf", now)
+                pipe.zrangebyscore(REVOKED_SET_KEY, now, "+inf")
+                _, remote = await pipe.execute()
+            except Exception as e:
+                redis_manager.mark_failed()
+                logger.warning(f"Token revocation sync failed: {e}")
+                return len(self.local)
+
+        bloom = BloomFilter(max(self.capacity, len(remote)), self.error_rate)
+        for jti in remote:
+            bloom.add(jti)
+        # Added last so revocations made during the sync are not lost
+        for jti in list(self.local):
+            bloom.add(jti)
+        self.bloom = bloom
+        return len(remote)
+
+    async def _sync_loop(self) -> None:
+        while True:
+            await self.sync()
+            await asyncio.sleep(self.sync_interval)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+token_revocation = TokenRevocationStore(
+    capacity=settings.TOKEN_REVOCATION_CAPACITY,
+    error_rate=settings.TOKEN_REVOCATION_ERROR_RATE,
+    sync_interval=settings.TOKEN_REVOCATION_SYNC_SECONDS,
+)
@@ -0,0 +1,70 @@
+"""
+Audit writer throughput benchmark
+
+Compares the inline audit path (last-hash lookup + flush per entry on the
+request session) against the group-commit writer, with N concurrent
+"requests" each writing one audit entry. Requires a reachable database
+(DATABASE_URL); writes real rows into audit_logs.
+
+Usage:
+    python -m benchmarks.audit_writer --entries 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+
+from app.database import init_db, close_db, get_db_context
+from app.utils.audit import create_audit_log
+from app.utils.audit_writer import audit_writer
+
+
+async def _one_request(i: int, wait: bool) -> None:
+    async with get_db_context() as db:
+        await create_audit_log(
+            db=db,
+            action="BILL_VIEW",
+            actor_type="user",
+            user_id=i,
+            resource_type="bill",
+            resource_id=i,
+            wait=wait,
+        )
+
+
+async def _run(entries: int, concurrency: int, wait: bool) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(i: int):
+        async with semaphore:
+            await _one_request(i, wait)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(bounded(i) for i in range(entries)))
+    if audit_writer.running:
+        await audit_writer.stop()
+    return time.perf_counter() - start
+
+
+async def main(entries: int, concurrency: int) -> None:
+    await init_db()
+
+    # Inline path: writer not started. Concurrent inline writers may fork
+    # the chain - that race is one of the things the writer removes.
+    elapsed = await _run(entries, concurrency, wait=False)
+    print(f"inline            : {entries / elapsed:10.0f} entries/sec ({elapsed:.2f}s)")
+
+    for durable in (False, True):
+        await audit_writer.start()
+        elapsed = await _run(entries, concurrency, wait=durable)
+        label = "writer (durable)" if durable else "writer (async)"
+        print(f"{label:18}: {entries / elapsed:10.0f} entries/sec ({elapsed:.2f}s)")
+
+    await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.entries, args.concurrency))
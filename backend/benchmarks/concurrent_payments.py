@@ -0,0 +1,159 @@
+"""
+Concurrent payment load test
+
+Creates a set of throwaway users with one bill each, then fires
+`--payers` concurrent POST /api/v1/bills/pay requests through the ASGI
+app (several payers share each user/bill, as with two kiosks serving the
+same account). Afterwards it checks that:
+
+- every bill's amount_paid equals the sum of its successful payments and
+  amount_paid + outstanding_amount == total_amount
+- each user's payment chain is linear: every payment's previous_hash is
+  the transaction_hash of the payment before it, and the chain head
+  stored on the user matches the last payment
+
+Requires a reachable database (DATABASE_URL).
+
+Usage:
+    python -m benchmarks.concurrent_payments --payers 500 --users 50
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+
+# Keep the limiter out of the way; this measures the payment path only
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "100000000")
+
+import httpx
+from sqlalchemy import select
+
+from app.main import app
+from app.database import init_db, close_db, async_session_maker
+from app.models.user import User
+from app.models.bill import Bill, BillStatus, UtilityType
+from app.models.payment import Payment
+from app.utils.encryption import encrypt_data, hash_data
+from app.utils.security import create_access_token
+
+AMOUNT = Decimal("10.00")
+
+
+async def _create_fixtures(users: int, payments_per_bill: int):
+    fixtures = []
+    async with async_session_maker() as db:
+        for _ in range(users):
+            mobile = f"9{uuid.uuid4().int % 10**9:09d}"
+            user = User(
+                mobile_encrypted=encrypt_data(mobile),
+                mobile_hash=hash_data(mobile + uuid.uuid4().hex),
+                is_verified=True,
+                is_active=True,
+            )
+            db.add(user)
+            await db.flush()
+
+            total = AMOUNT * payments_per_bill
+            bill = Bill(
+                bill_number=f"LOAD{uuid.uuid4().hex[:12].upper()}",
+                account_number="LOADTEST",
+                user_id=user.id,
+                utility_type=UtilityType.ELECTRICITY,
+                billing_period_start=date.today() - timedelta(days=30),
+                billing_period_end=date.today(),
+                base_amount=total,
+                total_amount=total,
+                amount_paid=Decimal("0"),
+                outstanding_amount=total,
+                bill_date=date.today(),
+                due_date=date.today() + timedelta(days=15),
+                status=BillStatus.PENDING,
+            )
+            db.add(bill)
+            await db.flush()
+
+            token = create_access_token({"sub": str(user.id), "user_type": "citizen"})
+            fixtures.append((user.id, bill.id, token))
+        await db.commit()
+    return fixtures
+
+
+async def _check(fixtures) -> list:
+    problems = []
+    async with async_session_maker() as db:
+        for user_id, bill_id, _ in fixtures:
+            bill = (await db.execute(select(Bill).where(Bill.id == bill_id))).scalar_one()
+            payments = (await db.execute(
+                select(Payment).where(Payment.user_id == user_id).order_by(Payment.id)
+            )).scalars().all()
+            head = (await db.execute(
+                select(User.payment_chain_head).where(User.id == user_id)
+            )).scalar_one()
+
+            paid = sum((p.amount for p in payments), Decimal("0"))
+            if bill.amount_paid != paid:
+                problems.append(f"bill {bill_id}: amount_paid {bill.amount_paid} != payments {paid}")
+            if bill.amount_paid + bill.outstanding_amount != bill.total_amount:
+                problems.append(f"bill {bill_id}: paid + outstanding != total")
+
+            previous = None
+            for p in payments:
+                if p.previous_hash != previous:
+                    problems.append(f"user {user_id}: chain fork at payment {p.id}")
+                previous = p.transaction_hash
+            if head != previous:
+                problems.append(f"user {user_id}: stored head does not match last payment")
+    return problems
+
+
+async def main(payers: int, users: int) -> int:
+    await init_db()
+    payments_per_bill = max(1, payers // users)
+    fixtures = await _create_fixtures(users, payments_per_bill)
+
+    statuses = defaultdict(int)
+    latencies = []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        async def pay(i: int):
+            _, bill_id, token = fixtures[i % len(fixtures)]
+            start = time.perf_counter()
+            response = await client.post(
+                "/api/v1/bills/pay",
+                json={"bill_id": bill_id, "amount": str(AMOUNT), "payment_method": "upi"},
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(pay(i) for i in range(payers)))
+        elapsed = time.perf_counter() - start
+
+    problems = await _check(fixtures)
+    await close_db()
+
+    latencies.sort()
+    print(f"payers={payers} users={users} elapsed={elapsed:.2f}s ({payers / elapsed:.0f} payments/sec)")
+    print(f"status codes: {dict(statuses)}")
+    print(f"latency p50={latencies[len(latencies) // 2] * 1000:.1f}ms "
+          f"p99={latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f}ms")
+    if problems:
+        print(f"FAILED: {len(problems)} problems")
+        for problem in problems[:20]:
+            print(f"  {problem}")
+        return 1
+    print("OK: balances correct, every chain linear")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payers", type=int, default=500)
+    parser.add_argument("--users", type=int, default=50)
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(main(args.payers, args.users)))
@@ -0,0 +1,113 @@
+"""
+Admin dashboard benchmark
+
+Compares three ways of serving GET /analytics/dashboard:
+
+- sequential: the previous implementation, 15 statements awaited one
+  after another on one session (reconstructed here)
+- concurrent: one FILTER aggregate per table, fanned out over pooled
+  connections, uncached
+- cached: `--admins` concurrent refreshes through the single-flight cache
+
+and reports the latency and the number of SQL statements each run took.
+Requires a reachable database (DATABASE_URL); only reads.
+
+Usage:
+    python -m benchmarks.dashboard --runs 20 --admins 10
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime
+
+from sqlalchemy import select, func, and_
+
+from app.database import engine, init_db, close_db, async_session_maker
+from app.models.session import KioskSession
+from app.models.payment import Payment, PaymentStatus
+from app.models.grievance import Grievance, GrievanceStatus
+from app.models.connection import ConnectionRequest, ConnectionStatus
+from app.models.bill import Bill, BillStatus
+from app.models.user import User
+from app.routers.analytics import _load_dashboard_stats, dashboard_cache
+from app.utils.query_stats import install_query_stats, start_request_stats, finish_request_stats
+
+
+async def _sequential(today_start: datetime) -> None:
+    """The previous dashboard's statements, one at a time on one session"""
+    ended = KioskSession.ended_at != None
+    statements = [
+        select(func.count(User.id)),
+        select(func.count(KioskSession.id)).where(
+            and_(KioskSession.started_at >= today_start, KioskSession.ended_at == None)
+        ),
+        select(func.count(Payment.id), func.sum(Payment.total_amount)).where(
+            and_(Payment.completed_at >= today_start, Payment.status == PaymentStatus.SUCCESS)
+        ),
+        select(func.count(Bill.id)).where(Bill.status.in_([BillStatus.PENDING, BillStatus.PARTIALLY_PAID])),
+        select(func.count(Bill.id)).where(Bill.status == BillStatus.OVERDUE),
+        select(func.count(Grievance.id)),
+        select(func.count(Grievance.id)).where(Grievance.status.in_([
+            GrievanceStatus.SUBMITTED, GrievanceStatus.ACKNOWLEDGED,
+            GrievanceStatus.IN_PROGRESS, GrievanceStatus.ESCALATED
+        ])),
+        select(func.count(Grievance.id)).where(and_(
+            Grievance.resolution_date >= today_start,
+            Grievance.status.in_([GrievanceStatus.RESOLVED, GrievanceStatus.CLOSED])
+        )),
+        select(func.count(ConnectionRequest.id)).where(ConnectionRequest.status.notin_([
+            ConnectionStatus.COMPLETED, ConnectionStatus.REJECTED, ConnectionStatus.CANCELLED
+        ])),
+        select(KioskSession.services_used).where(KioskSession.started_at >= today_start),
+        select(func.extract('hour', KioskSession.started_at), func.count(KioskSession.id))
+        .where(KioskSession.started_at >= today_start)
+        .group_by(func.extract('hour', KioskSession.started_at)),
+        select(Grievance.category, func.count(Grievance.id)).group_by(Grievance.category),
+        select(func.avg(KioskSession.active_duration_seconds)).where(ended),
+        select(func.count(KioskSession.id)).where(ended),
+        select(func.count(KioskSession.id)).where(and_(ended, KioskSession.completed_transaction == False)),
+    ]
+    async with async_session_maker() as db:
+        for statement in statements:
+            (await db.execute(statement)).all()
+
+
+async def _timed(label: str, run, runs: int) -> None:
+    latencies = []
+    queries = 0
+    for _ in range(runs):
+        stats, token = start_request_stats(label)
+        start = time.perf_counter()
+        await run()
+        latencies.append((time.perf_counter() - start) * 1000)
+        finish_request_stats(token)
+        queries += stats.count
+    print(f"{label:12}: p50 {statistics.median(latencies):8.2f} ms, "
+          f"max {max(latencies):8.2f} ms, {queries / runs:5.1f} statements per run")
+
+
+async def main(runs: int, admins: int) -> None:
+    await init_db()
+    install_query_stats(engine)
+    today_start = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+
+    async def cached_burst():
+        dashboard_cache.invalidate(today_start.date())
+        await asyncio.gather(*(
+            dashboard_cache.get(today_start.date(), lambda: _load_dashboard_stats(today_start))
+            for _ in range(admins)
+        ))
+
+    await _timed("sequential", lambda: _sequential(today_start), runs)
+    await _timed("concurrent", lambda: _load_dashboard_stats(today_start), runs)
+    await _timed(f"cached x{admins}", cached_burst, runs)
+    await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--admins", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.runs, args.admins))
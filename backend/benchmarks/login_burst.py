@@ -0,0 +1,118 @@
+"""
+Login burst latency benchmark
+
+Fires `--logins` concurrent admin logins (bcrypt verification) through
+the ASGI app while a probe requests GET /health every few milliseconds,
+and reports the probe's latency percentiles: without a burst, during a
+burst with bcrypt run inline on the event loop (the old behaviour), and
+during a burst with bcrypt in the CPU offload pool.
+
+Requires a reachable database (DATABASE_URL); creates a throwaway admin.
+
+Usage:
+    python -m benchmarks.login_burst --logins 50
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+# Keep the limiter out of the way; this measures event loop stalls only
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "100000000")
+os.environ.setdefault("RATE_LIMIT_ROUTES", "")
+
+import httpx
+
+from app.main import app
+from app.database import init_db, close_db, async_session_maker
+from app.models.admin import Admin, AdminRole
+from app.routers import admin as admin_router
+from app.utils.security import hash_password, verify_password, verify_password_async
+from app.utils.cpu_executor import shutdown_cpu_executor
+
+PASSWORD = "benchmark-password"
+PROBE_INTERVAL = 0.005
+
+
+async def _inline_verify_password(plain_password: str, hashed_password: str) -> bool:
+    return verify_password(plain_password, hashed_password)
+
+
+async def _create_admin() -> str:
+    username = f"bench_{uuid.uuid4().hex[:12]}"
+    async with async_session_maker() as db:
+        db.add(Admin(
+            username=username,
+            email=f"{username}@benchmark.local",
+            password_hash=hash_password(PASSWORD),
+            full_name="Benchmark Admin",
+            role=AdminRole.VIEWER,
+            is_active=True,
+            is_verified=True,
+        ))
+        await db.commit()
+    return username
+
+
+def _percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+
+async def _measure(client: httpx.AsyncClient, username: str, logins: int) -> list:
+    """Probe /health until the login burst (if any) completes"""
+    latencies = []
+    done = asyncio.Event()
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await client.get("/health")
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(PROBE_INTERVAL)
+
+    async def burst():
+        if logins:
+            await asyncio.gather(*(
+                client.post("/api/v1/admin/login", json={"username": username, "password": PASSWORD})
+                for _ in range(logins)
+            ))
+        else:
+            await asyncio.sleep(1)
+        done.set()
+
+    await asyncio.gather(probe(), burst())
+    return latencies
+
+
+async def main(logins: int) -> None:
+    await init_db()
+    username = await _create_admin()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        runs = [
+            ("idle", 0, verify_password_async),
+            ("burst, inline bcrypt", logins, _inline_verify_password),
+            ("burst, offloaded bcrypt", logins, verify_password_async),
+        ]
+        for label, count, verifier in runs:
+            admin_router.verify_password_async = verifier
+            start = time.perf_counter()
+            latencies = await _measure(client, username, count)
+            elapsed = time.perf_counter() - start
+            print(f"{label:24}: /health p50={_percentile(latencies, 0.5):7.1f}ms "
+                  f"p99={_percentile(latencies, 0.99):7.1f}ms "
+                  f"max={_percentile(latencies, 1.0):7.1f}ms "
+                  f"({len(latencies)} probes, {elapsed:.2f}s)")
+
+    admin_router.verify_password_async = verify_password_async
+    shutdown_cpu_executor()
+    await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins))
@@ -0,0 +1,148 @@
+"""
+Middleware overhead benchmark
+
+Times sequential requests to GET /health and GET /api/v1/bills/ through
+the ASGI app with three middleware stacks:
+
+- none: CORS only, no logging, metrics or rate limiting
+- BaseHTTPMiddleware: logging and rate limiting as BaseHTTPMiddleware
+  subclasses (the previous implementation, reconstructed here)
+- pure ASGI: the current RequestLoggingMiddleware, RateLimitMiddleware
+  and MetricsMiddleware
+
+and reports the mean per-request time and the overhead relative to
+"none". Logging is set to WARNING so log output does not dominate.
+
+Requires a reachable database (DATABASE_URL) for the /bills requests;
+creates a throwaway user.
+
+Usage:
+    python -m benchmarks.middleware_overhead --requests 2000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+import uuid
+
+# Keep the limiter from rejecting; this measures its cost, not its limits
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "100000000")
+
+import httpx
+from fastapi import Request
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.main import app
+from app.database import init_db, close_db, async_session_maker
+from app.models.user import User
+from app.middleware.logging import RequestLoggingMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.utils.encryption import encrypt_data, hash_data
+from app.utils.security import create_access_token
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    """Request logging as it was implemented on BaseHTTPMiddleware"""
+
+    async def dispatch(self, request: Request, call_next):
+        request_id = str(uuid.uuid4())[:8]
+        start_time = time.time()
+        logging.getLogger("suvidha").info(f"[{request_id}] {request.method} {request.url.path}")
+        request.state.request_id = request_id
+        response = await call_next(request)
+        duration = time.time() - start_time
+        logging.getLogger("suvidha").info(f"[{request_id}] {response.status_code} {duration:.3f}s")
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    """Rate limiting as it was implemented on BaseHTTPMiddleware"""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.inner = RateLimitMiddleware(app)
+
+    async def dispatch(self, request: Request, call_next):
+        if request.url.path in RateLimitMiddleware.EXEMPT_PATHS:
+            return await call_next(request)
+        key = self.inner._client_key(request.headers, request.client)
+        bucket, key, limit = self.inner._limit_for(request.url.path, key, request.client)
+        _, remaining, _ = await self.inner.limiter.is_allowed(f"{bucket}:{key}", limit, self.inner.window)
+        response = await call_next(request)
+        response.headers["X-RateLimit-Limit"] = str(limit)
+        response.headers["X-RateLimit-Remaining"] = str(remaining)
+        return response
+
+
+CUSTOM = (RequestLoggingMiddleware, RateLimitMiddleware, MetricsMiddleware)
+ORIGINAL_STACK = list(app.user_middleware)
+BASE_STACK = [m for m in ORIGINAL_STACK if m.cls not in CUSTOM]
+
+STACKS = {
+    "none": BASE_STACK,
+    "BaseHTTPMiddleware": [Middleware(LegacyRateLimitMiddleware), Middleware(LegacyLoggingMiddleware)] + BASE_STACK,
+    "pure ASGI": ORIGINAL_STACK,
+}
+
+
+def _use_stack(middleware: list) -> None:
+    app.user_middleware = list(middleware)
+    app.middleware_stack = None  # Rebuilt on the next request
+
+
+async def _create_user_token() -> str:
+    mobile = f"9{uuid.uuid4().int % 10**9:09d}"
+    async with async_session_maker() as db:
+        user = User(
+            mobile_encrypted=encrypt_data(mobile),
+            mobile_hash=hash_data(mobile + uuid.uuid4().hex),
+            is_verified=True,
+            is_active=True,
+        )
+        db.add(user)
+        await db.commit()
+        return create_access_token({"sub": str(user.id), "user_type": "citizen"})
+
+
+async def _time(client: httpx.AsyncClient, path: str, headers: dict, requests: int) -> float:
+    for _ in range(min(100, requests)):  # Warm up
+        await client.get(path, headers=headers)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await client.get(path, headers=headers)
+    return (time.perf_counter() - start) / requests * 1_000_000
+
+
+async def main(requests: int) -> None:
+    logging.getLogger("suvidha").setLevel(logging.WARNING)
+    logging.getLogger("suvidha.access").setLevel(logging.WARNING)
+    await init_db()
+    token = await _create_user_token()
+
+    paths = {
+        "/health": {},
+        "/api/v1/bills/": {"Authorization": f"Bearer {token}"},
+    }
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        for path, headers in paths.items():
+            baseline = None
+            for label, stack in STACKS.items():
+                _use_stack(stack)
+                micros = await _time(client, path, headers, requests)
+                baseline = micros if baseline is None else baseline
+                print(f"{path:16} {label:20}: {micros:9.1f} us/request "
+                      f"(+{micros - baseline:7.1f} us middleware)")
+
+    _use_stack(ORIGINAL_STACK)
+    await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,76 @@
+"""
+In-memory rate limiter microbenchmark
+
+Compares the previous list-of-timestamps limiter with the GCRA
+InMemoryRateLimiter on two workloads:
+
+- hot key: one client sending `--requests` requests (the list version
+  rebuilds a list of up to `limit` timestamps on every call)
+- many keys: `--requests` requests from distinct client IPs (the list
+  version keeps every key forever)
+
+and reports calls/sec plus memory retained after the run. No database or
+Redis needed.
+
+Usage:
+    python -m benchmarks.rate_limiter --requests 200000 --limit 100
+"""
+import argparse
+import time
+import tracemalloc
+from typing import Dict, Tuple
+
+from app.middleware.rate_limit import InMemoryRateLimiter
+
+WINDOW = 60
+
+
+class ListRateLimiter:
+    """The previous implementation, kept here for comparison"""
+
+    def __init__(self):
+        self.requests: Dict[str, list] = {}
+
+    def is_allowed(self, key: str, limit: int, window: int) -> Tuple[bool, int]:
+        current_time = time.time()
+        if key not in self.requests:
+            self.requests[key] = []
+        self.requests[key] = [t for t in self.requests[key] if t > current_time - window]
+        if len(self.requests[key]) >= limit:
+            return False, 0
+        self.requests[key].append(current_time)
+        return True, limit - len(self.requests[key])
+
+
+def _run(limiter, keys, limit: int) -> Tuple[float, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    for key in keys:
+        limiter.is_allowed(key, limit, WINDOW)
+    elapsed = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(keys) / elapsed, retained
+
+
+def main(requests: int, limit: int, max_keys: int) -> None:
+    workloads = {
+        "hot key": ["user:kiosk-1"] * requests,
+        "many keys": [f"ip:10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(requests)],
+    }
+    for workload, keys in workloads.items():
+        for label, limiter in (
+            ("list (previous)", ListRateLimiter()),
+            ("gcra", InMemoryRateLimiter(max_keys=max_keys)),
+        ):
+            rate, retained = _run(limiter, keys, limit)
+            print(f"{workload:9} {label:16}: {rate:12,.0f} calls/sec, {retained / 1024:10,.0f} KiB retained")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--max-keys", type=int, default=100000)
+    args = parser.parse_args()
+    main(args.requests, args.limit, args.max_keys)
@@ -0,0 +1,23 @@
+"""
+Shared fixtures
+"""
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.database
+from app.database import Base
+
+
+@pytest_asyncio.fixture
+async def session_maker(monkeypatch):
+    """Sessions on a fresh in-memory SQLite database"""
+    pytest.importorskip("aiosqlite")
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    # Background writers open their sessions through app.database
+    monkeypatch.setattr(app.database, "async_session_maker", maker)
+    yield maker
+    await engine.dispose()
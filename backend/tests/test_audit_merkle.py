@@ -0,0 +1,57 @@
+"""
+Merkle roots and inclusion proofs over audit log hashes
+"""
+import hashlib
+
+import pytest
+
+from app.utils.audit_merkle import merkle_root, merkle_proof, verify_merkle_proof, segment_bounds
+
+
+def _log_hashes(count):
+    return [hashlib.sha256(str(i).encode()).hexdigest() for i in range(count)]
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 4, 5, 7, 8, 9, 16, 33])
+def test_every_leaf_proves_inclusion(count):
+    log_hashes = _log_hashes(count)
+    root = merkle_root(log_hashes)
+
+    for index, log_hash in enumerate(log_hashes):
+        assert verify_merkle_proof(log_hash, merkle_proof(log_hashes, index), root)
+
+
+def test_single_leaf_has_an_empty_proof():
+    log_hashes = _log_hashes(1)
+    assert merkle_proof(log_hashes, 0) == []
+    assert verify_merkle_proof(log_hashes[0], [], merkle_root(log_hashes))
+
+
+def test_proof_rejects_another_leaf_or_root():
+    log_hashes = _log_hashes(9)
+    root = merkle_root(log_hashes)
+    proof = merkle_proof(log_hashes, 4)
+
+    assert not verify_merkle_proof(log_hashes[5], proof, root)
+    assert not verify_merkle_proof(log_hashes[4], proof, merkle_root(_log_hashes(10)))
+
+
+def test_proof_rejects_swapped_sibling_position():
+    log_hashes = _log_hashes(8)
+    proof = merkle_proof(log_hashes, 2)
+    proof[0]["position"] = "left" if proof[0]["position"] == "right" else "right"
+
+    assert not verify_merkle_proof(log_hashes[2], proof, merkle_root(log_hashes))
+
+
+def test_root_changes_with_order_and_content():
+    log_hashes = _log_hashes(6)
+    root = merkle_root(log_hashes)
+
+    assert merkle_root(list(reversed(log_hashes))) != root
+    assert merkle_root(log_hashes[:5] + [hashlib.sha256(b"tampered").hexdigest()]) != root
+
+
+def test_segment_bounds():
+    assert segment_bounds(0, 1024) == (1, 1024)
+    assert segment_bounds(2, 1024) == (2049, 3072)
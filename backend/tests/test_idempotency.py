@@ -0,0 +1,58 @@
+"""
+Idempotency key reserve / complete / release, on the in-process store
+"""
+import json
+
+import pytest
+
+from app.utils.idempotency import IdempotencyStore, InMemoryIdempotencyStore, IN_PROGRESS, fingerprint_request
+
+
+@pytest.mark.asyncio
+async def test_reserve_complete_release():
+    store = IdempotencyStore(ttl=60)
+    fingerprint = fingerprint_request('{"bill_id": 1, "amount": "100"}')
+
+    assert await store.reserve("key-1", fingerprint) is None
+    # A retry while the first request is running sees it in progress
+    assert await store.reserve("key-1", fingerprint) == {"fingerprint": fingerprint, "response": IN_PROGRESS}
+
+    response = json.dumps({"transaction_id": "TXN1"})
+    await store.complete("key-1", fingerprint, response)
+    assert await store.reserve("key-1", fingerprint) == {"fingerprint": fingerprint, "response": response}
+
+    await store.release("key-1")
+    assert await store.reserve("key-1", fingerprint) is None
+
+
+@pytest.mark.asyncio
+async def test_keys_are_independent():
+    store = IdempotencyStore(ttl=60)
+
+    assert await store.reserve("key-1", "a") is None
+    assert await store.reserve("key-2", "b") is None
+    assert (await store.reserve("key-1", "c"))["fingerprint"] == "a"
+
+
+def test_fingerprint_depends_on_the_body():
+    assert fingerprint_request('{"amount": "100"}') == fingerprint_request('{"amount": "100"}')
+    assert fingerprint_request('{"amount": "100"}') != fingerprint_request('{"amount": "200"}')
+
+
+def test_local_entries_expire():
+    store = InMemoryIdempotencyStore()
+
+    assert store.set("key", "value", ttl=0)
+    assert store.get("key") is None
+    assert store.set("key", "value", ttl=60, only_if_absent=True)
+    assert not store.set("key", "other", ttl=60, only_if_absent=True)
+    assert store.get("key") == "value"
+
+
+def test_local_sweep_drops_expired_entries():
+    store = InMemoryIdempotencyStore()
+    for i in range(store.SWEEP_EVERY - 1):
+        store.set(f"expired-{i}", "value", ttl=0)
+    store.set("live", "value", ttl=60)
+
+    assert list(store.entries) == ["live"]
@@ -0,0 +1,77 @@
+"""
+Prometheus text rendering
+"""
+import pytest
+
+from app.metrics import MetricsRegistry
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+
+def test_unlabelled_metrics_render_zero_before_any_update(registry):
+    registry.counter("jobs_total", "Jobs run")
+    registry.histogram("job_seconds", "Job latency", buckets=(0.1, 1.0))
+
+    assert registry.render() == (
+        "# HELP jobs_total Jobs run\n"
+        "# TYPE jobs_total counter\n"
+        "jobs_total 0\n"
+        "# HELP job_seconds Job latency\n"
+        "# TYPE job_seconds histogram\n"
+        'job_seconds_bucket{le="0.1"} 0\n'
+        'job_seconds_bucket{le="1"} 0\n'
+        'job_seconds_bucket{le="+Inf"} 0\n'
+        "job_seconds_sum 0\n"
+        "job_seconds_count 0\n"
+    )
+
+
+def test_labelled_counter(registry):
+    requests = registry.counter("requests_total", "Requests", ("method", "status"))
+    requests.inc("GET", "200")
+    requests.inc("GET", "200")
+    requests.inc("POST", "500", amount=0.5)
+
+    assert registry.render().splitlines()[2:] == [
+        'requests_total{method="GET",status="200"} 2',
+        'requests_total{method="POST",status="500"} 0.5',
+    ]
+
+
+def test_label_values_are_escaped(registry):
+    registry.counter("paths_total", "Paths", ("path",)).inc('/a"b\\c\nd')
+
+    assert registry.render().splitlines()[2] == 'paths_total{path="/a\\"b\\\\c\\nd"} 1'
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    latency = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, "/bills")
+
+    assert registry.render().splitlines()[2:] == [
+        'latency_seconds_bucket{route="/bills",le="0.1"} 2',
+        'latency_seconds_bucket{route="/bills",le="1"} 3',
+        'latency_seconds_bucket{route="/bills",le="+Inf"} 4',
+        'latency_seconds_sum{route="/bills"} 3.65',
+        'latency_seconds_count{route="/bills"} 4',
+    ]
+
+
+def test_collectors_run_before_rendering(registry):
+    connections = registry.gauge("pool_connections", "Pool connections", ("state",))
+    registry.add_collector(lambda: connections.set("idle", value=4))
+
+    assert 'pool_connections{state="idle"} 4' in registry.render()
+
+
+def test_wrong_label_count_and_duplicate_names_are_rejected(registry):
+    requests = registry.counter("requests_total", "Requests", ("method",))
+
+    with pytest.raises(ValueError):
+        requests.inc("GET", "200")
+    with pytest.raises(ValueError):
+        registry.counter("requests_total", "Requests again")
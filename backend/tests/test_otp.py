@@ -0,0 +1,157 @@
+"""
+OTP store and verification, including non-ASCII guesses
+"""
+import hashlib
+
+import pytest
+from pydantic import ValidationError
+
+import app.utils.security as security
+from app.schemas.user import OTPVerify
+from app.utils.otp_store import LocalOTPStore
+
+ARABIC_INDIC_DIGITS = "١٢٣٤٥٦"
+
+
+@pytest.fixture
+def store():
+    return LocalOTPStore(max_size=3, max_attempts=3, sweep_interval=60)
+
+
+def test_match_redeems_the_otp(store):
+    store.set("otp:a", "123456", ttl=60)
+
+    assert store.verify("otp:a", "123456") is True
+    assert store.verify("otp:a", "123456") is None
+
+
+def test_wrong_guesses_drop_the_otp(store):
+    store.set("otp:a", "123456", ttl=60)
+
+    assert store.verify("otp:a", "000000") is False
+    assert store.verify("otp:a", "000001") is False
+    assert store.verify("otp:a", "000002") is False
+    # Dropped after max_attempts wrong guesses, even for the right OTP
+    assert store.verify("otp:a", "123456") is None
+
+
+def test_non_ascii_guess_is_a_wrong_guess(store):
+    store.set("otp:a", "123456", ttl=60)
+
+    assert store.verify("otp:a", ARABIC_INDIC_DIGITS) is False
+    assert store.verify("otp:a", "123456") is True
+
+
+def test_expired_otp_fails(store):
+    store.set("otp:a", "123456", ttl=0)
+
+    assert store.verify("otp:a", "123456") is False
+    assert len(store) == 0
+
+
+def test_store_is_bounded_and_evicts_the_oldest(store):
+    for i in range(4):
+        store.set(f"otp:{i}", "123456", ttl=60)
+
+    assert len(store) == 3
+    assert store.verify("otp:0", "123456") is None
+    # Reissuing moves a key to the back
+    store.set("otp:1", "654321", ttl=60)
+    store.set("otp:4", "123456", ttl=60)
+    assert store.verify("otp:2", "123456") is None
+    assert store.verify("otp:1", "654321") is True
+
+
+def test_sweep_removes_expired_entries(store):
+    store.set("otp:expired", "123456", ttl=0)
+    store.set("otp:live", "123456", ttl=60)
+
+    assert store.sweep() == 1
+    assert len(store) == 1
+
+
+def test_schema_accepts_only_ascii_digits():
+    assert OTPVerify(mobile="9876543210", otp="123456").otp == "123456"
+    with pytest.raises(ValidationError):
+        OTPVerify(mobile="9876543210", otp=ARABIC_INDIC_DIGITS)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def incr(self, key):
+        self.calls.append(("incr", key))
+
+    def expire(self, key, seconds):
+        self.calls.append(("expire", key))
+
+    async def execute(self):
+        results = []
+        for command, key in self.calls:
+            if command == "incr":
+                self.redis.values[key] = int(self.redis.values.get(key, 0)) + 1
+                results.append(self.redis.values[key])
+            else:
+                results.append(True)
+        return results
+
+
+class FakeRedis:
+    """The subset of the client verify_otp uses, with decoded responses"""
+
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def delete(self, *keys):
+        return sum(self.values.pop(key, None) is not None for key in keys)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = FakeRedis()
+    failures = []
+    monkeypatch.setattr(security, "get_redis", lambda: client)
+    monkeypatch.setattr(security.redis_manager, "mark_failed", lambda: failures.append(True))
+    client.failures = failures
+    return client
+
+
+def _otp_key(mobile: str) -> str:
+    return f"otp:{hashlib.sha256(mobile.encode()).hexdigest()}"
+
+
+@pytest.mark.asyncio
+async def test_verify_otp_through_redis(redis):
+    redis.values[_otp_key("9876543210")] = "123456"
+
+    assert await security.verify_otp("9876543210", "000000") is False
+    assert redis.values[f"{_otp_key('9876543210')}:attempts"] == 1
+    assert await security.verify_otp("9876543210", "123456") is True
+    # Redeemed
+    assert await security.verify_otp("9876543210", "123456") is False
+
+
+@pytest.mark.asyncio
+async def test_non_ascii_guess_does_not_mark_redis_failed(redis):
+    redis.values[_otp_key("9876543210")] = "123456"
+
+    assert await security.verify_otp("9876543210", ARABIC_INDIC_DIGITS) is False
+    assert redis.failures == []
+    assert redis.values[f"{_otp_key('9876543210')}:attempts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_non_ascii_guess_without_redis(monkeypatch):
+    monkeypatch.setattr(security, "get_redis", lambda: None)
+    security.local_otp_store.set(_otp_key("9876543211"), "123456", ttl=60)
+
+    assert await security.verify_otp("9876543211", ARABIC_INDIC_DIGITS) is False
+    assert await security.verify_otp("9876543211", "123456") is True
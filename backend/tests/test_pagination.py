@@ -0,0 +1,52 @@
+"""
+Keyset pagination cursors
+"""
+import base64
+from datetime import date, datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.utils.pagination import encode_cursor, decode_cursor
+
+
+def _raw_cursor(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+def test_round_trip():
+    created_at = datetime(2024, 3, 1, 12, 30, 15, 250000)
+
+    assert decode_cursor(encode_cursor(2, created_at, 41), int, datetime, int) == [2, created_at, 41]
+    assert decode_cursor(encode_cursor(date(2024, 3, 31), 7), date, int) == [date(2024, 3, 31), 7]
+
+
+def test_missing_cursor_is_first_page():
+    assert decode_cursor(None, datetime, int) is None
+    assert decode_cursor("", datetime, int) is None
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    _raw_cursor("{not json"),
+    _raw_cursor('{"a": 1}'),
+    # Wrong size for the sort key
+    encode_cursor(datetime(2024, 1, 1)),
+    encode_cursor(datetime(2024, 1, 1), 1, 2),
+    # Wrong value types
+    encode_cursor("2024-01-01", 1),
+    encode_cursor(datetime(2024, 1, 1), "1"),
+    encode_cursor(datetime(2024, 1, 1), 1.5),
+    encode_cursor(datetime(2024, 1, 1), True),
+    encode_cursor(date(2024, 1, 1), 1),
+    encode_cursor(datetime(2024, 1, 1), None),
+    _raw_cursor('[{"x": "2024-01-01"}, 1]'),
+    _raw_cursor('[{"dt": 5}, 1]'),
+    # Aware timestamps and out of range ids
+    encode_cursor(datetime(2024, 1, 1, tzinfo=timezone.utc), 1),
+    encode_cursor(datetime(2024, 1, 1), 2 ** 31),
+])
+def test_malformed_or_mismatched_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as excinfo:
+        decode_cursor(cursor, datetime, int)
+    assert excinfo.value.status_code == 400
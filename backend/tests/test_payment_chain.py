@@ -0,0 +1,104 @@
+"""
+Per-user payment hash chain: compare-and-swap appends and stale heads
+"""
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, update
+
+from app.models.user import User
+from app.utils.payment_chain import (
+    payment_chain_heads,
+    append_to_payment_chain,
+    append_many_to_payment_chain,
+    compute_transaction_hash,
+    _MISSING,
+)
+
+
+@pytest_asyncio.fixture
+async def user_id(session_maker):
+    async with session_maker() as db:
+        user = User(mobile_encrypted="encrypted", mobile_hash="a" * 64)
+        db.add(user)
+        await db.commit()
+    payment_chain_heads.invalidate(user.id)
+    yield user.id
+    payment_chain_heads.invalidate(user.id)
+
+
+def _payment(transaction_id: str, amount: str = "100.00") -> dict:
+    return {
+        "transaction_id": transaction_id,
+        "bill_id": 1,
+        "amount": Decimal(amount),
+        "timestamp": datetime(2024, 5, 1, 10, 0),
+    }
+
+
+async def _stored_head(session_maker, user_id: int):
+    async with session_maker() as db:
+        return (await db.execute(select(User.payment_chain_head).where(User.id == user_id))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_appends_link_and_move_the_head(session_maker, user_id):
+    async with session_maker() as db:
+        first_hash, first_previous = await append_to_payment_chain(db, user_id, **_payment("TXN1"))
+        # Second append takes the cached-head compare-and-swap path
+        second_hash, second_previous = await append_to_payment_chain(db, user_id, **_payment("TXN2"))
+        await db.commit()
+
+    assert first_previous is None
+    assert first_hash == compute_transaction_hash("TXN1", 1, Decimal("100.00"), datetime(2024, 5, 1, 10, 0), None)
+    assert second_previous == first_hash
+    assert await _stored_head(session_maker, user_id) == second_hash
+    assert payment_chain_heads.get(user_id) == second_hash
+
+
+@pytest.mark.asyncio
+async def test_batch_moves_the_head_once(session_maker, user_id):
+    async with session_maker() as db:
+        links = await append_many_to_payment_chain(db, user_id, [_payment("TXN1"), _payment("TXN2"), _payment("TXN3")])
+        await db.commit()
+
+    assert [previous for _, previous in links] == [None, links[0][0], links[1][0]]
+    assert await _stored_head(session_maker, user_id) == links[-1][0]
+
+
+@pytest.mark.asyncio
+async def test_stale_cached_head_falls_back_to_the_stored_head(session_maker, user_id):
+    async with session_maker() as db:
+        head, _ = await append_to_payment_chain(db, user_id, **_payment("TXN1"))
+        await db.commit()
+
+    # Another worker appended since this one cached the head
+    async with session_maker() as db:
+        await db.execute(update(User).where(User.id == user_id).values(payment_chain_head="f" * 64))
+        await db.commit()
+    assert payment_chain_heads.get(user_id) == head
+
+    async with session_maker() as db:
+        new_head, previous = await append_to_payment_chain(db, user_id, **_payment("TXN2"))
+        await db.commit()
+
+    assert previous == "f" * 64
+    assert await _stored_head(session_maker, user_id) == new_head
+    assert payment_chain_heads.get(user_id) == new_head
+
+
+@pytest.mark.asyncio
+async def test_cache_miss_reads_the_stored_head(session_maker, user_id):
+    async with session_maker() as db:
+        head, _ = await append_to_payment_chain(db, user_id, **_payment("TXN1"))
+        await db.commit()
+    payment_chain_heads.invalidate(user_id)
+    assert payment_chain_heads.get(user_id) is _MISSING
+
+    async with session_maker() as db:
+        _, previous = await append_to_payment_chain(db, user_id, **_payment("TXN2"))
+        await db.commit()
+
+    assert previous == head
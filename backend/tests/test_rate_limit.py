@@ -0,0 +1,111 @@
+"""
+GCRA limiter math and rate limit keys
+"""
+import types
+
+import pytest
+from starlette.datastructures import Headers
+
+import app.middleware.rate_limit as rate_limit
+from app.middleware.rate_limit import InMemoryRateLimiter, RateLimitMiddleware, parse_route_limits
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(rate_limit, "time", types.SimpleNamespace(monotonic=lambda: clock.now))
+    return clock
+
+
+def test_burst_of_limit_then_rejected(clock):
+    limiter = InMemoryRateLimiter(max_keys=100)
+
+    # 3 per 60 s: one token every 20 s, bursts of 3
+    assert limiter.is_allowed("k", 3, 60) == (True, 2, 0)
+    assert limiter.is_allowed("k", 3, 60) == (True, 1, 0)
+    assert limiter.is_allowed("k", 3, 60) == (True, 0, 0)
+    assert limiter.is_allowed("k", 3, 60) == (False, 0, 20)
+
+
+def test_tokens_refill_at_the_emission_interval(clock):
+    limiter = InMemoryRateLimiter(max_keys=100)
+    for _ in range(3):
+        limiter.is_allowed("k", 3, 60)
+
+    clock.now += 19
+    assert limiter.is_allowed("k", 3, 60) == (False, 0, 1)
+    clock.now += 1
+    assert limiter.is_allowed("k", 3, 60) == (True, 0, 0)
+    # A full window refills the whole burst
+    clock.now += 60
+    assert limiter.is_allowed("k", 3, 60) == (True, 2, 0)
+
+
+def test_rejections_do_not_consume_tokens(clock):
+    limiter = InMemoryRateLimiter(max_keys=100)
+    for _ in range(3):
+        limiter.is_allowed("k", 3, 60)
+    for _ in range(10):
+        assert not limiter.is_allowed("k", 3, 60)[0]
+
+    clock.now += 20
+    assert limiter.is_allowed("k", 3, 60)[0]
+
+
+def test_keys_are_independent(clock):
+    limiter = InMemoryRateLimiter(max_keys=100)
+    for _ in range(3):
+        limiter.is_allowed("a", 3, 60)
+
+    assert not limiter.is_allowed("a", 3, 60)[0]
+    assert limiter.is_allowed("b", 3, 60)[0]
+
+
+def test_table_is_bounded(clock):
+    limiter = InMemoryRateLimiter(max_keys=2)
+    for key in ("a", "b", "c", "d"):
+        limiter.is_allowed(key, 3, 60)
+
+    assert list(limiter.tats) == ["c", "d"]
+
+
+def test_refilled_keys_are_evicted(clock):
+    limiter = InMemoryRateLimiter(max_keys=100)
+    limiter.is_allowed("a", 3, 60)
+    clock.now += 21
+
+    limiter.is_allowed("b", 3, 60)
+    assert list(limiter.tats) == ["b"]
+
+
+def test_route_limits_longest_prefix_first():
+    assert parse_route_limits("/api/v1/auth=10, /api/v1/auth/otp=3,bad") == [
+        ("/api/v1/auth/otp", 3),
+        ("/api/v1/auth", 10),
+    ]
+
+
+@pytest.fixture
+def middleware(monkeypatch):
+    monkeypatch.setattr(rate_limit.settings, "RATE_LIMIT_KIOSK_IDS", "KIOSK-1")
+    monkeypatch.setattr(rate_limit.settings, "RATE_LIMIT_ROUTES", "/api/v1/auth/send-otp=3")
+    return RateLimitMiddleware(app=None)
+
+
+def test_only_registered_kiosks_get_their_own_bucket(middleware):
+    client = ("10.0.0.5", 5000)
+
+    assert middleware._client_key(Headers({"X-Kiosk-ID": "KIOSK-1"}), client) == "kiosk:KIOSK-1:10.0.0.5"
+    assert middleware._client_key(Headers({"X-Kiosk-ID": "made-up"}), client) == "ip:10.0.0.5"
+    assert middleware._client_key(Headers({"Authorization": "Bearer invalid"}), client) == "ip:10.0.0.5"
+
+
+def test_route_buckets_are_keyed_on_the_client_ip(middleware):
+    client = ("10.0.0.5", 5000)
+
+    assert middleware._limit_for("/api/v1/auth/send-otp", "kiosk:KIOSK-1:10.0.0.5", client) == (
+        "/api/v1/auth/send-otp", "ip:10.0.0.5", 3
+    )
+    assert middleware._limit_for("/api/v1/bills", "kiosk:KIOSK-1:10.0.0.5", client) == (
+        "global", "kiosk:KIOSK-1:10.0.0.5", middleware.limits["kiosk"]
+    )
@@ -0,0 +1,77 @@
+"""
+Bloom filter and token revocation without Redis
+"""
+import time
+
+import pytest
+
+from app.utils.token_revocation import BloomFilter, TokenRevocationStore
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    members = [f"jti-{i}" for i in range(1000)]
+    for member in members:
+        bloom.add(member)
+
+    assert all(member in bloom for member in members)
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"jti-{i}")
+
+    false_positives = sum(f"other-{i}" in bloom for i in range(20000))
+    # At capacity the rate should be close to error_rate
+    assert false_positives / 20000 < 0.02
+
+
+def test_bloom_filter_sizing():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    # m = -n ln p / (ln 2)^2, k = m / n ln 2
+    assert bloom.size == 9585
+    assert bloom.hash_count == 7
+
+
+@pytest.fixture
+def store():
+    return TokenRevocationStore(capacity=100, error_rate=0.01, sync_interval=60)
+
+
+@pytest.mark.asyncio
+async def test_revoked_token_is_rejected(store):
+    await store.revoke("jti-1", int(time.time()) + 300)
+
+    assert await store.is_revoked("jti-1")
+    assert not await store.is_revoked("jti-2")
+    assert not await store.is_revoked(None)
+
+
+@pytest.mark.asyncio
+async def test_expired_token_is_not_recorded(store):
+    await store.revoke("jti-1", int(time.time()) - 1)
+
+    assert "jti-1" not in store.local
+    assert not await store.is_revoked("jti-1")
+
+
+@pytest.mark.asyncio
+async def test_unconfirmable_filter_hit_fails_closed(store):
+    # In the filter (e.g. synced from another worker) but not revoked here, and no Redis to ask
+    store.bloom.add("jti-1")
+
+    assert await store.is_revoked("jti-1")
+
+
+@pytest.mark.asyncio
+async def test_sync_keeps_unexpired_local_revocations(store):
+    now = int(time.time())
+    await store.revoke("live", now + 300)
+    store.local["expired"] = now - 1
+
+    await store.sync()
+
+    assert store.local == {"live": now + 300}
+    assert "live" in store.bloom
+    assert await store.is_revoked("live")
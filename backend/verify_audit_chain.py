@@ -0,0 +1,33 @@
+"""
+Audit chain verification CLI
+Verifies the audit_logs hash chain from the last checkpoint (or from
+genesis with --full) and prints a report with throughput in rows/sec.
+Exits with status 1 if any broken link or hash mismatch is found.
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+from app.database import close_db
+from app.utils.audit_verify import verify_audit_chain
+
+
+async def main(args) -> int:
+    report = await verify_audit_chain(
+        batch_size=args.batch_size,
+        workers=args.workers,
+        full=args.full,
+    )
+    await close_db()
+    
+    print(json.dumps(report, indent=2))
+    return 0 if report["status"] == "ok" else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify the SUVIDHA audit log hash chain")
+    parser.add_argument("--full", action="store_true", help="Ignore checkpoints and verify from genesis")
+    parser.add_argument("--batch-size", type=int, default=None, help="Rows per verification batch")
+    parser.add_argument("--workers", type=int, default=None, help="Hashing processes (1 = inline)")
+    sys.exit(asyncio.run(main(parser.parse_args())))
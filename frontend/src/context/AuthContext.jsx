@@ -1,4 +1,5 @@
 import { createContext, useContext, useState, useEffect } from 'react';
+import { authAPI } from '../services/api';
 
 const AuthContext = createContext(null);
 
@@ -28,6 +29,11 @@ export function AuthProvider({ children }) {
     };
 
     const logout = () => {
+        // Revoke both tokens server-side; local logout proceeds regardless
+        const accessToken = localStorage.getItem('access_token');
+        if (accessToken) {
+            authAPI.logout(accessToken, localStorage.getItem('refresh_token')).catch(() => {});
+        }
         localStorage.removeItem('access_token');
         localStorage.removeItem('refresh_token');
         localStorage.removeItem('user');
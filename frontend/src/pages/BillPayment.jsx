@@ -13,6 +13,8 @@ export default function BillPayment() {
     const [paying, setPaying] = useState(false);
     const [paymentMethod, setPaymentMethod] = useState('UPI');
     const [error, setError] = useState('');
+    // One key per payment screen, so a retried request is applied only once
+    const [idempotencyKey] = useState(() => crypto.randomUUID());
 
     useEffect(() => {
         fetchBill();
@@ -38,7 +40,7 @@ export default function BillPayment() {
                 bill_id: parseInt(id),
                 amount: bill.outstanding_amount,
                 payment_method: paymentMethod
-            });
+            }, idempotencyKey);
 
             // Navigate to receipt
             navigate(`/receipt/payment/${res.data.transaction_id}`, {
@@ -64,14 +64,20 @@ export const authAPI = {
     requestOTP: (mobile) => api.post('/auth/login', { mobile }),
     verifyOTP: (mobile, otp) => api.post('/auth/verify-otp', { mobile, otp }),
     getProfile: () => api.get('/auth/me'),
-    logout: () => api.post('/auth/logout'),
+    logout: (accessToken, refreshToken) => api.post(
+        '/auth/logout',
+        refreshToken ? { refresh_token: refreshToken } : undefined,
+        { headers: { Authorization: `Bearer ${accessToken}` } }
+    ),
 };
 
 // Bills API
 export const billsAPI = {
     getBills: (params) => api.get('/bills/', { params }),
     getBill: (id) => api.get(`/bills/${id}`),
-    payBill: (data) => api.post('/bills/pay', data),
+    payBill: (data, idempotencyKey) => api.post('/bills/pay', data, {
+        headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {},
+    }),
     getPaymentHistory: (params) => api.get('/bills/history/all', { params }),
 };
 
@@ -44,6 +44,8 @@ export const offlineTransactions = {
     const db = await dbPromise;
     const data = {
       ...transaction,
+      // Stable key so replays after a timeout never create a second payment
+      idempotency_key: transaction.idempotency_key || crypto.randomUUID(),
       status: 'pending',
       created_at: new Date().toISOString(),
       sync_attempts: 0,
@@ -143,7 +145,10 @@ export const userData = {
   },
 };
 
-// Sync pending transactions when online
+// Max payments per batch sync request (server limit)
+const SYNC_BATCH_SIZE = 100;
+
+// Sync pending transactions when online, in ordered batches
 export async function syncPendingTransactions() {
   if (!navigator.onLine) return { synced: 0, failed: 0 };
 
@@ -151,29 +156,50 @@ export async function syncPendingTransactions() {
   let synced = 0;
   let failed = 0;
 
-  for (const tx of pending) {
+  for (let start = 0; start < pending.length; start += SYNC_BATCH_SIZE) {
+    const chunk = pending.slice(start, start + SYNC_BATCH_SIZE);
+
     try {
-      const response = await fetch('/api/v1/bills/pay', {
+      const response = await fetch('/api/v1/bills/pay/batch', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
           'Authorization': `Bearer ${localStorage.getItem('access_token')}`,
         },
-        body: JSON.stringify(tx.data),
+        body: JSON.stringify({
+          payments: chunk.map((tx) => ({
+            ...tx.data,
+            idempotency_key: tx.idempotency_key || `offline-${tx.id}-${tx.created_at}`,
+            queued_at: tx.created_at,
+          })),
+        }),
       });
 
-      if (response.ok) {
-        const result = await response.json();
-        await offlineTransactions.markSynced(tx.id, result);
-        synced++;
-      } else {
+      if (!response.ok) {
         const error = await response.text();
-        await offlineTransactions.markFailed(tx.id, error);
-        failed++;
+        for (const tx of chunk) {
+          await offlineTransactions.markFailed(tx.id, error);
+        }
+        failed += chunk.length;
+        continue;
+      }
+
+      const { results } = await response.json();
+      for (const result of results) {
+        const tx = chunk[result.index];
+        if (result.status === 'FAILED') {
+          await offlineTransactions.markFailed(tx.id, result.error);
+          failed++;
+        } else {
+          await offlineTransactions.markSynced(tx.id, result.payment);
+          synced++;
+        }
       }
     } catch (error) {
-      await offlineTransactions.markFailed(tx.id, error.message);
-      failed++;
+      for (const tx of chunk) {
+        await offlineTransactions.markFailed(tx.id, error.message);
+      }
+      failed += chunk.length;
     }
   }
 